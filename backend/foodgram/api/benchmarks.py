@@ -0,0 +1,18 @@
+from math import ceil
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(ceil(len(ordered) * percent / 100) - 1, 0)]
+
+
+def summarize(timings):
+    result = {f'p{percent}_ms': round(percentile(timings, percent), 3)
+              for percent in PERCENTILES}
+    result.update({
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'max_ms': round(max(timings), 3),
+    })
+    return result
@@ -1,6 +1,13 @@
 from django_filters.rest_framework import FilterSet, filters
 
 from recipes.models import Recipe, Tag, Ingredient
+from recipes.search import search_recipes
+
+RECIPE_ORDERINGS = {
+    'newest': ('-pub_date', '-id'),
+    'popular': ('-favorites_count', '-pub_date', '-id'),
+    'trending': ('-trending_score', '-pub_date', '-id'),
+}
 
 
 class AuthorAndTagFilter(FilterSet):
@@ -14,6 +21,11 @@ class AuthorAndTagFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='is_in_shopping_cart_filter'
     )
+    search = filters.CharFilter(method='search_filter')
+    ordering = filters.ChoiceFilter(
+        choices=[(name, name) for name in RECIPE_ORDERINGS],
+        method='ordering_filter',
+    )
 
     class Meta:
         model = Recipe
@@ -22,6 +34,8 @@ class AuthorAndTagFilter(FilterSet):
             'author',
             'is_favorited',
             'is_in_shopping_cart',
+            'search',
+            'ordering',
         )
 
     def is_favorited_filter(self, queryset, name, data):
@@ -36,6 +50,12 @@ class AuthorAndTagFilter(FilterSet):
             return queryset.filter(shoppingcart__user=user)
         return queryset
 
+    def search_filter(self, queryset, name, data):
+        return search_recipes(queryset, data)
+
+    def ordering_filter(self, queryset, name, data):
+        return queryset.order_by(*RECIPE_ORDERINGS[data])
+
 
 class IngredientFilter(FilterSet):
     name = filters.CharFilter(lookup_expr='istartswith')
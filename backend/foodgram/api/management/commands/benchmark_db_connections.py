@@ -0,0 +1,62 @@
+import json
+from copy import deepcopy
+from time import perf_counter
+
+from django.core.management import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+
+from api.benchmarks import summarize
+
+MODES = {
+    'new': {'CONN_MAX_AGE': 0, 'POOL': None},
+    'persistent': {'CONN_MAX_AGE': None, 'POOL': None},
+    'persistent_health_checks': {'CONN_MAX_AGE': None, 'POOL': None,
+                                 'CONN_HEALTH_CHECKS': True},
+    'pool': {'CONN_MAX_AGE': 0,
+             'POOL': {'MIN_SIZE': 1, 'MAX_SIZE': 4, 'TIMEOUT': 10}},
+}
+POOLED_MODES = ('persistent_health_checks', 'pool')
+
+
+class Command(BaseCommand):
+    help = ('Compares per-request database cost with new, persistent '
+            'and pooled connections')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--query', default='SELECT 1')
+        parser.add_argument('--mode', action='append', choices=MODES)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        base_settings = connections.databases[options['database']]
+        backend = load_backend(base_settings['ENGINE'])
+        supported = hasattr(backend.DatabaseWrapper,
+                            'close_if_health_check_failed')
+        report = {'engine': base_settings['ENGINE'], 'modes': {}}
+        for mode in options['mode'] or MODES:
+            if mode in POOLED_MODES and not supported:
+                self.stderr.write(f'{mode}: не поддерживается движком')
+                continue
+            settings = deepcopy(base_settings)
+            settings.update(MODES[mode])
+            report['modes'][mode] = self.measure(
+                backend.DatabaseWrapper(settings, f'benchmark_{mode}'),
+                options['query'], options['iterations'])
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+    def measure(self, connection, query, iterations):
+        timings = []
+        try:
+            for _ in range(iterations):
+                start = perf_counter()
+                connection.close_if_unusable_or_obsolete()
+                with connection.cursor() as cursor:
+                    cursor.execute(query)
+                    cursor.fetchall()
+                connection.close_if_unusable_or_obsolete()
+                timings.append((perf_counter() - start) * 1000)
+        finally:
+            connection.close()
+        return summarize(timings)
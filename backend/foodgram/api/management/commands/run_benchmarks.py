@@ -0,0 +1,149 @@
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+from itertools import cycle
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.benchmarks import summarize
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+
+def get_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Times key API endpoints through the test client and reports '
+            'latency percentiles and query counts as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--endpoint', action='append',
+                            help='Запустить только указанные сценарии')
+        parser.add_argument('--output', help='Файл для JSON-отчета')
+        parser.add_argument('--compare',
+                            help='JSON-отчет предыдущего запуска '
+                                 'для сравнения')
+
+    def handle(self, *args, **options):
+        user = User.objects.annotate(
+            follows=Count('follower', distinct=True),
+            carts=Count('shoppingcart', distinct=True),
+        ).order_by('-follows', '-carts').first()
+        recipe_ids = list(Recipe.objects.order_by(
+            '-favorites_count').values_list('id', flat=True)[:100])
+        if user is None or not recipe_ids:
+            raise CommandError('Нет данных, запустите seed_benchmark_data')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        endpoints = self.get_endpoints(recipe_ids)
+        if options['endpoint']:
+            unknown = set(options['endpoint']) - set(endpoints)
+            if unknown:
+                raise CommandError('Неизвестные сценарии: {}'.format(
+                    ', '.join(sorted(unknown))))
+            endpoints = {name: urls for name, urls in endpoints.items()
+                         if name in options['endpoint']}
+        report = {
+            'revision': get_revision(),
+            'started': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'iterations': options['iterations'],
+            'data': {
+                'users': User.objects.count(),
+                'recipes': Recipe.objects.count(),
+            },
+            'endpoints': {},
+        }
+        for name, urls in endpoints.items():
+            self.stderr.write(f'{name}...')
+            report['endpoints'][name] = self.measure(
+                urls, options['iterations'], options['warmup'])
+        content = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(content)
+        else:
+            self.stdout.write(content)
+        if options['compare']:
+            self.compare(options['compare'], report)
+
+    def get_endpoints(self, recipe_ids):
+        tags = list(Tag.objects.values_list('slug', flat=True)[:2])
+        ingredient = Ingredient.objects.annotate(
+            recipes=Count('ingredient')
+        ).order_by('-recipes', 'id').values_list('name', flat=True).first()
+        tag_filter = '&'.join(f'tags={slug}' for slug in tags)
+        return {
+            'recipe_list': ['/api/recipes/?limit=6'],
+            'recipe_list_filtered': [
+                f'/api/recipes/?{tag_filter}&is_favorited=1&limit=6'],
+            'recipe_list_popular': ['/api/recipes/?ordering=popular&limit=6'],
+            'recipe_search': [f'/api/recipes/?search={ingredient.split()[0]}'],
+            'recipe_detail': [f'/api/recipes/{recipe_id}/'
+                              for recipe_id in recipe_ids],
+            'recipe_feed': ['/api/recipes/feed/?limit=6'],
+            'subscriptions': ['/api/users/subscriptions/?recipes_limit=3'],
+            'download_shopping_cart': [
+                '/api/recipes/download_shopping_cart/'],
+            'ingredient_search': [f'/api/ingredients/?name={ingredient[:3]}'],
+        }
+
+    def request(self, url):
+        response = self.client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def measure(self, urls, iterations, warmup):
+        urls = cycle(urls)
+        for _ in range(warmup):
+            self.request(next(urls))
+        timings, queries, statuses = [], [], set()
+        for _ in range(iterations):
+            url = next(urls)
+            with CaptureQueriesContext(connection) as context:
+                start = perf_counter()
+                response = self.request(url)
+                timings.append((perf_counter() - start) * 1000)
+            queries.append(len(context.captured_queries))
+            statuses.add(response.status_code)
+        result = summarize(timings)
+        result.update({
+            'queries': max(queries),
+            'statuses': sorted(statuses),
+        })
+        return result
+
+    def compare(self, path, report):
+        try:
+            with open(path, encoding='utf-8') as file:
+                baseline = json.load(file)['endpoints']
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Не удалось прочитать {path}: {error}')
+        for name, current in report['endpoints'].items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            self.stderr.write(
+                '{}: p50 {:+.1f}%, p95 {:+.1f}%, запросов {} -> {}'.format(
+                    name,
+                    (current['p50_ms'] / previous['p50_ms'] - 1) * 100,
+                    (current['p95_ms'] / previous['p95_ms'] - 1) * 100,
+                    previous['queries'], current['queries']))
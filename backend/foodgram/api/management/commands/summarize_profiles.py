@@ -0,0 +1,40 @@
+import pstats
+from io import StringIO
+
+from django.core.management import BaseCommand, CommandError
+
+from api.profiling import get_profile_dir
+
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+
+
+class Command(BaseCommand):
+    help = 'Summarizes the hottest functions across captured API profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view',
+                            help='Только профили представления, '
+                                 'например RecipeViewSet.list')
+        parser.add_argument('--match',
+                            help='Регулярное выражение для функций, '
+                                 'например serializers')
+        parser.add_argument('--sort', choices=SORT_KEYS,
+                            default='cumulative')
+        parser.add_argument('--limit', type=int, default=30)
+
+    def handle(self, *args, **options):
+        files = sorted(get_profile_dir().glob('*.prof'))
+        if options['view']:
+            files = [path for path in files
+                     if f'-{options["view"]}-' in path.name]
+        if not files:
+            raise CommandError('Профили не найдены')
+        output = StringIO()
+        stats = pstats.Stats(*map(str, files), stream=output)
+        stats.sort_stats(options['sort'])
+        self.stdout.write(f'Профилей: {len(files)}')
+        restrictions = [options['limit']]
+        if options['match']:
+            restrictions.insert(0, options['match'])
+        stats.print_stats(*restrictions)
+        self.stdout.write(output.getvalue())
@@ -0,0 +1,154 @@
+import logging
+from bisect import bisect_left
+from contextlib import ExitStack
+from threading import Lock
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+TIME_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+class QueryBudgetError(Exception):
+    pass
+
+
+class Histogram:
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        buckets = dict(zip(map(str, self.bounds), self.counts))
+        buckets['+Inf'] = self.counts[-1]
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'max': round(self.max, 3),
+            'buckets': buckets,
+        }
+
+
+class MetricsRegistry:
+    fields = {
+        'queries': QUERY_BUCKETS,
+        'db_ms': TIME_BUCKETS,
+        'serialize_ms': TIME_BUCKETS,
+        'total_ms': TIME_BUCKETS,
+    }
+
+    def __init__(self):
+        self.lock = Lock()
+        self.views = {}
+
+    def observe(self, view, **values):
+        with self.lock:
+            histograms = self.views.get(view)
+            if histograms is None:
+                histograms = self.views[view] = {
+                    field: Histogram(bounds)
+                    for field, bounds in self.fields.items()}
+            for field, value in values.items():
+                histograms[field].observe(value)
+
+    def as_dict(self):
+        with self.lock:
+            return {view: {field: histogram.as_dict()
+                           for field, histogram in histograms.items()}
+                    for view, histograms in sorted(self.views.items())}
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+registry = MetricsRegistry()
+
+
+class QueryTimer:
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += perf_counter() - start
+
+
+def get_view_name(view_func, method):
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+def check_query_budget(view, queries):
+    budget = getattr(settings, 'QUERY_BUDGETS', {}).get(
+        view, getattr(settings, 'QUERY_BUDGET_DEFAULT', None))
+    if budget is None or queries <= budget:
+        return
+    message = f'{view}: {queries} SQL-запросов при бюджете {budget}'
+    if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+        raise QueryBudgetError(message)
+    logger.error('Превышен бюджет запросов к БД — %s', message)
+
+
+class InstrumentationMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = perf_counter()
+        request.query_timer = timer = QueryTimer()
+        request.instrumented_view = None
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(timer))
+            response = self.get_response(request)
+        view = request.instrumented_view
+        if view is None:
+            return response
+        total = perf_counter() - start
+        view_start, view_db = request.instrumented_view_start
+        serialize = (start + total - view_start) - (timer.duration - view_db)
+        values = {
+            'queries': timer.count,
+            'db_ms': timer.duration * 1000,
+            'serialize_ms': max(serialize, 0) * 1000,
+            'total_ms': total * 1000,
+        }
+        registry.observe(view, **values)
+        response['Server-Timing'] = (
+            'db;dur={db_ms:.1f};desc="{queries} queries", '
+            'serialize;dur={serialize_ms:.1f}, '
+            'total;dur={total_ms:.1f}'.format(**values))
+        check_query_budget(view, timer.count)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.instrumented_view = get_view_name(view_func, request.method)
+        request.instrumented_view_start = (perf_counter(),
+                                           request.query_timer.duration)
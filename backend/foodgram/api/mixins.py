@@ -0,0 +1,49 @@
+from functools import partial
+from hashlib import sha256
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from recipes.catalog import get_version
+
+
+class CatalogCacheMixin:
+    catalog_cache_timeout = getattr(settings, 'CATALOG_CACHE_TIMEOUT',
+                                    60 * 60 * 24)
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        return self.get_cached_response(
+            request, 'list', partial(super().list, request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request, f'retrieve:{kwargs[self.lookup_field]}',
+            partial(super().retrieve, request, *args, **kwargs))
+
+    def get_cached_response(self, request, name, render):
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return render()
+        model = self.queryset.model
+        cache_key = 'catalog:{}:{}:{}'.format(
+            model._meta.label_lower, get_version(model), name)
+        entry = cache.get(cache_key)
+        if entry is None:
+            response = render()
+            if response.status_code != 200:
+                return response
+            content = request.accepted_renderer.render(response.data)
+            entry = (content, '"{}"'.format(sha256(content).hexdigest()))
+            cache.set(cache_key, entry, self.catalog_cache_timeout)
+        content, etag = entry
+        if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        return response
@@ -1,6 +1,145 @@
-from rest_framework.pagination import PageNumberPagination
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     page_size = 3
+
+
+class LimitCursorPagination(CursorPagination):
+    page_size_query_param = 'limit'
+    page_size = 3
+    ordering = ('-id',)
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.fields = [queryset.model._meta.get_field(name.lstrip('-'))
+                       for name in self.ordering]
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count = queryset.count()
+        self.cursor = self.decode_cursor(request)
+        ordering, reverse = self.ordering, False
+        if self.cursor is not None:
+            position, reverse = self.cursor
+            queryset = queryset.filter(
+                self.get_position_filter(position, reverse))
+        if reverse:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}'
+                        for name in ordering]
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def get_position_filter(self, position, reverse):
+        # Строки с одинаковым значением первого поля различает следующее
+        # поле порядка, поэтому позиция — это весь кортеж, а не OFFSET.
+        bound = Q()
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') != reverse else 'gt'
+            if not bound:
+                bound = Q(**{f'{field}__{lookup}e': value})
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return bound & condition
+
+    def get_position(self, instance):
+        return [field.value_to_string(instance) for field in self.fields]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+            values = tokens['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [field.to_python(value)
+                        for field, value in zip(self.fields, values)]
+        except (KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, instance, reverse):
+        tokens = {'p': self.get_position(instance)}
+        if reverse:
+            tokens['r'] = '1'
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param,
+                                   encoded)
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.page):
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            response = {'count': self.count, **response}
+        return Response(response)
+
+
+class SwitchablePaginationMixin:
+    pagination_class = LimitPageNumberPagination
+    cursor_pagination_class = LimitCursorPagination
+    cursor_ordering = ('-id',)
+    cursor_actions = ()
+    page_number_params = ()
+    pagination_query_param = 'pagination'
+
+    def get_cursor_ordering(self):
+        return self.cursor_ordering
+
+    def uses_cursor(self):
+        params = self.request.query_params
+        if any(name in params for name in self.page_number_params):
+            return False
+        return (self.action in self.cursor_actions
+                or params.get(self.pagination_query_param) == 'cursor'
+                or 'cursor' in params)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.uses_cursor():
+                self._paginator = self.cursor_pagination_class()
+                self._paginator.ordering = self.get_cursor_ordering()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
@@ -1,5 +1,8 @@
+from django.conf import settings
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
+LOCAL_ADDRESSES = {'127.0.0.1', '::1', *getattr(settings, 'INTERNAL_IPS', [])}
+
 
 class IsAuthorOrReadOnly(BasePermission):
     def has_permission(self, request, view):
@@ -9,3 +12,9 @@ class IsAuthorOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         return (request.method in SAFE_METHODS
                 or obj.author == request.user)
+
+
+class IsAdminOrLocal(BasePermission):
+    def has_permission(self, request, view):
+        return (request.user.is_staff
+                or request.META.get('REMOTE_ADDR') in LOCAL_ADDRESSES)
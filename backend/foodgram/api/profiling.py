@@ -0,0 +1,98 @@
+import cProfile
+import logging
+import random
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from .metrics import get_view_name
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_QUERY_PARAM = '_profile'
+
+
+def get_profile_dir():
+    return Path(getattr(settings, 'PROFILING_DIR',
+                        Path(settings.BASE_DIR) / 'profiles'))
+
+
+def rotate_profiles(directory):
+    max_files = getattr(settings, 'PROFILING_MAX_FILES', 200)
+    max_bytes = getattr(settings, 'PROFILING_MAX_BYTES', 50 * 1024 * 1024)
+    files = sorted(directory.glob('*.prof'),
+                   key=lambda path: path.stat().st_mtime, reverse=True)
+    total = 0
+    for index, path in enumerate(files):
+        total += path.stat().st_size
+        if index >= max_files or total > max_bytes:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ProfilingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def is_requested(self, request):
+        return (request.META.get(PROFILE_HEADER) == '1'
+                or request.GET.get(PROFILE_QUERY_PARAM) == '1')
+
+    def is_allowed(self, request):
+        if request.META.get('REMOTE_ADDR') in getattr(settings,
+                                                      'INTERNAL_IPS', ()):
+            return True
+        try:
+            credentials = TokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return credentials is not None and credentials[0].is_staff
+
+    def __call__(self, request):
+        requested = self.is_requested(request) and self.is_allowed(request)
+        sampled = random.random() < getattr(settings,
+                                            'PROFILING_SAMPLE_RATE', 0)
+        if not requested and not sampled:
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return self.get_response(request)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        view = getattr(request, 'profiled_view', None)
+        if view is None:
+            return response
+        name = self.save(profiler, view, perf_counter() - start)
+        if requested and name:
+            response['X-Profile-File'] = name
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.profiled_view = get_view_name(view_func, request.method)
+
+    def save(self, profiler, view, duration):
+        directory = get_profile_dir()
+        name = '{}-{}-{:.0f}ms.prof'.format(
+            datetime.now().strftime('%Y%m%d%H%M%S%f'), view,
+            duration * 1000)
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(directory / name)
+            rotate_profiles(directory)
+        except OSError:
+            logger.exception('Не удалось сохранить профиль %s', name)
+            return None
+        return name
@@ -1,13 +1,17 @@
 from django.contrib.auth import get_user_model
-from django.forms import CharField, ValidationError
+from django.forms import CharField
 from djoser.serializers import (UserCreateSerializer, UserSerializer,
                                 PasswordSerializer)
 from recipes.models import (Recipe, Tag, Ingredient, RecipeIngredient,
                             Favorite, ShoppingCart)
+from recipes.images import schedule_thumbnails, thumbnail_urls
+from recipes.shopping_list import bump_recipe_carts
+from recipes.similar import refresh_similar
+from recipes.tasks import run_in_background
 from rest_framework.serializers import (ModelSerializer, IntegerField,
-                                        ReadOnlyField,
-                                        PrimaryKeyRelatedField,
-                                        SerializerMethodField)
+                                        ListField, ReadOnlyField,
+                                        SerializerMethodField,
+                                        ValidationError)
 
 from drf_extra_fields.fields import Base64ImageField
 from users.models import Follow
@@ -17,6 +21,35 @@ from django.db import transaction
 User = get_user_model()
 
 
+def get_subscriptions(request):
+    if not hasattr(request, 'subscriptions'):
+        request.subscriptions = set(
+            Follow.objects.filter(user=request.user).values_list(
+                'author_id', flat=True))
+    return request.subscriptions
+
+
+def build_url(request, url):
+    if request is None:
+        return url
+    return request.build_absolute_uri(url)
+
+
+def get_thumbnails(recipe, request):
+    return {size: build_url(request, url)
+            for size, url in thumbnail_urls(recipe).items()}
+
+
+def get_recipes_limit(request):
+    if request is None:
+        return None
+    try:
+        limit = int(request.query_params.get('recipes_limit'))
+    except (TypeError, ValueError):
+        return None
+    return limit if limit >= 0 else None
+
+
 class ChangePasswordSerializer(PasswordSerializer):
     new_password = CharField(required=True)
 
@@ -41,7 +74,10 @@ class CustomUserSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        return Follow.objects.exists()
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return False
+        return obj.id in get_subscriptions(request)
 
 
 class CustomUserCreateSerializer(UserCreateSerializer):
@@ -52,37 +88,24 @@ class CustomUserCreateSerializer(UserCreateSerializer):
                   'last_name', 'password')
 
 
-class FollowSerializer(ModelSerializer):
-    email = ReadOnlyField(source='author.email')
-    id = ReadOnlyField(source='author.id')
-    username = ReadOnlyField(source='author.username')
-    first_name = ReadOnlyField(source='author.first_name')
-    last_name = ReadOnlyField(source='author.last_name')
-    is_subscribed = SerializerMethodField()
+class SubscriptionSerializer(CustomUserSerializer):
     recipes = SerializerMethodField()
-    recipes_count = SerializerMethodField()
+    recipes_count = ReadOnlyField()
 
-    class Meta:
-        model = Follow
-        fields = ('email', 'id', 'username', 'first_name',
-                  'last_name', 'is_subscribed', 'recipes',
-                  'recipes_count')
-
-    def get_is_subscribed(self, obj):
-        return obj.author.following.filter(
-            user=obj.user, author=obj.author).exists()
-
-    def get_recipes_count(self, obj):
-        return obj.author.recipes.filter(
-            author=obj.author).count()
+    class Meta(CustomUserSerializer.Meta):
+        fields = CustomUserSerializer.Meta.fields + ('recipes',
+                                                     'recipes_count')
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        queryset = obj.author.recipes.all()
-        if limit:
-            queryset = queryset[:int(limit)]
-        return RecipeShortShowSerializer(queryset, many=True).data
+        if hasattr(obj, 'recipes_preview'):
+            queryset = obj.recipes_preview
+        else:
+            queryset = obj.recipes.order_by('-id')
+            limit = get_recipes_limit(self.context.get('request'))
+            if limit is not None:
+                queryset = queryset[:limit]
+        return RecipeShortShowSerializer(queryset, many=True,
+                                         context=self.context).data
 
 
 class TagSerializer(ModelSerializer):
@@ -109,61 +132,66 @@ class RecipeIngredientSerializer(ModelSerializer):
         model = RecipeIngredient
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
-    def get_ingredient(self, obj):
-        return obj.ingredient.first()
-
-    def to_representation(self, instance):
-        ingredient = self.get_ingredient(instance)
-        return super().to_representation(ingredient)
-
 
 class RecipeReadSerializer(ModelSerializer):
     tags = TagSerializer(read_only=True, many=True)
     author = CustomUserSerializer(read_only=True)
-    ingredients = RecipeIngredientSerializer(source='recipeingredient_set',
+    ingredients = RecipeIngredientSerializer(source='recipe',
                                              read_only=True, many=True)
     is_favorited = SerializerMethodField()
     is_in_shopping_cart = SerializerMethodField()
     image = Base64ImageField()
+    thumbnails = SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = '__all__'
+        fields = ('id', 'tags', 'author', 'ingredients', 'is_favorited',
+                  'is_in_shopping_cart', 'image', 'thumbnails', 'name',
+                  'text', 'cooking_time', 'pub_date')
 
-    def get_is_favorited(self, obj):
+    def get_user_flag(self, obj, name, related_name):
+        if hasattr(obj, name):
+            return getattr(obj, name)
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return False
+        return getattr(obj, related_name).filter(user=request.user).exists()
 
-        return obj.favorite.exists()
+    def get_is_favorited(self, obj):
+        return self.get_user_flag(obj, 'is_favorited', 'favorite')
 
     def get_is_in_shopping_cart(self, obj):
+        return self.get_user_flag(obj, 'is_in_shopping_cart', 'shoppingcart')
 
-        return obj.shoppingcart.exists()
-
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        request = self.context.get('request')
-        data['recipes'] = RecipeShortShowSerializer(
-            instance.author.recipes.all()[:request.GET.get('recipes_limit')],
-            many=True,
-            context=self.context
-        ).data
-        return data
+    def get_thumbnails(self, obj):
+        return get_thumbnails(obj, self.context.get('request'))
 
 
 class RecipeShortShowSerializer(ModelSerializer):
-    image = Base64ImageField(read_only=True)
+    image = SerializerMethodField()
     name = ReadOnlyField()
     cooking_time = ReadOnlyField()
+    thumbnails = SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'cooking_time', 'thumbnails')
+
+    def get_image(self, obj):
+        thumbnails = self.get_thumbnails(obj)
+        if 'small' in thumbnails:
+            return thumbnails['small']
+        if not obj.image:
+            return None
+        return build_url(self.context.get('request'), obj.image.url)
+
+    def get_thumbnails(self, obj):
+        return get_thumbnails(obj, self.context.get('request'))
 
 
 class RecipeSerializer(ModelSerializer):
     ingredients = RecipeIngredientSerializer(many=True)
-    tags = PrimaryKeyRelatedField(
-        many=True,
-        queryset=Tag.objects.all())
+    tags = ListField(child=IntegerField(), write_only=True)
     author = CustomUserSerializer(read_only=True)
     image = Base64ImageField()
 
@@ -180,28 +208,62 @@ class RecipeSerializer(ModelSerializer):
                              amount=ingredient.get('amount'),)
             for ingredient in ingredietns])
 
-    def validate_ingredient(self, data):
-        ingredients_list = []
-        for ingredient in data.get('recipeingredients'):
-            if int(ingredient.get('amount')) <= 0:
-                raise ValidationError(
-                    'Количество не может быть меньше 1'
-                )
-            ingredients_list.append(ingredient.get('id'))
-        if len(set(ingredients_list)) != len(ingredients_list):
-            raise ValidationError(
-                'Ингредиенты не должны повторяться!'
-            )
+    def update_ingredients_for_recipe(self, recipe, ingredients):
+        submitted = {ingredient['ingredient']['id']: ingredient['amount']
+                     for ingredient in ingredients}
+        current = {recipe_ingredient.ingredient_id: recipe_ingredient
+                   for recipe_ingredient in recipe.recipe.all()}
+        removed = [recipe_ingredient.id
+                   for ingredient_id, recipe_ingredient in current.items()
+                   if ingredient_id not in submitted]
+        changed = []
+        for ingredient_id, amount in submitted.items():
+            recipe_ingredient = current.get(ingredient_id)
+            if recipe_ingredient and recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        added = [RecipeIngredient(recipe=recipe, ingredient_id=ingredient_id,
+                                  amount=amount)
+                 for ingredient_id, amount in submitted.items()
+                 if ingredient_id not in current]
+        if removed:
+            RecipeIngredient.objects.filter(id__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        if added:
+            RecipeIngredient.objects.bulk_create(added)
+        return bool(removed or changed or added)
+
+    def validate_ids(self, ids, model, name):
+        if not ids:
+            return f'Укажите {name}!'
+        if len(set(ids)) != len(ids):
+            return f'{name.capitalize()} не должны повторяться!'
+        missing = set(ids) - set(
+            model.objects.filter(id__in=ids).values_list('id', flat=True))
+        if missing:
+            return '{} не найдены: {}'.format(
+                name.capitalize(), ', '.join(map(str, sorted(missing))))
+        return None
+
+    def validate(self, data):
+        errors = {}
+        if 'ingredients' in data:
+            errors['ingredients'] = self.validate_ids(
+                [ingredient['ingredient']['id']
+                 for ingredient in data['ingredients']],
+                Ingredient, 'ингредиенты')
+        if 'tags' in data:
+            errors['tags'] = self.validate_ids(data['tags'], Tag, 'теги')
+        errors = {field: error for field, error in errors.items() if error}
+        if errors:
+            raise ValidationError(errors)
         return data
 
-    def validate_tags(self, tags):
-        if not tags:
-            raise ValidationError('Укажите тэг!')
-        return tags
-
     def validate_cooking_time(self, cooking_time):
-        if int(cooking_time) == 0:
-            raise ValidationError('Время приготовления не может быть равно 0!')
+        if cooking_time < 1:
+            raise ValidationError(
+                'Время приготовления не может быть меньше 1 минуты!')
         return cooking_time
 
     @transaction.atomic()
@@ -211,41 +273,46 @@ class RecipeSerializer(ModelSerializer):
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
         self.create_ingredients_for_recipe(recipe, ingredients_data)
+        transaction.on_commit(lambda: schedule_thumbnails(recipe))
+        transaction.on_commit(
+            lambda: run_in_background(refresh_similar, recipe.id))
         return recipe
 
     @transaction.atomic()
     def update(self, instance, validated_data):
-        tags = validated_data.pop('tags')
-        ingredietns = validated_data.pop('ingredients')
-        instance.tags.clear()
-        RecipeIngredient.objects.filter(recipe=instance).delete()
-        instance.tags.set(tags)
-        self.create_ingredients_for_recipe(instance, ingredietns)
-        return super().update(instance, validated_data)
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        if tags is not None:
+            instance.tags.set(tags)
+        if (ingredients is not None
+                and self.update_ingredients_for_recipe(instance, ingredients)):
+            transaction.on_commit(lambda: bump_recipe_carts(instance))
+            transaction.on_commit(
+                lambda: run_in_background(refresh_similar, instance.id))
+        image = instance.image.name
+        instance = super().update(instance, validated_data)
+        if instance.image.name != image:
+            Recipe.objects.filter(pk=instance.pk).update(
+                thumbnails_ready=False)
+            instance.thumbnails_ready = False
+            transaction.on_commit(lambda: schedule_thumbnails(instance))
+        return instance
+
+    def to_representation(self, instance):
+        return RecipeReadSerializer(instance, context=self.context).data
 
 
 class FavoriteSerializer(ModelSerializer):
+    duplicate_error = 'Рецепт уже был добавлен в избранное'
 
     class Meta:
         model = Favorite
         fields = ('user', 'recipe')
 
-    def validate_user(self, user):
-        recipe = self.initial_data.get('recipe')
-        if user.favorite.filter(recipe=recipe).exists():
-            raise ValidationError('Рецепт уже был добавлен в избранное')
-
-        return user
-
 
 class ShoppingCartSerializer(ModelSerializer):
+    duplicate_error = 'Рецепт уже был добавлен в корзину'
 
     class Meta:
         model = ShoppingCart
         fields = ('user', 'recipe')
-
-    def validate_user(self, user):
-        recipe = self.initial_data.get('recipe')
-        if user.shoppingcart.filter(recipe=recipe).exists():
-            raise ValidationError('Рецепт уже был добавлен в корзину')
-        return user
@@ -0,0 +1,340 @@
+import json
+import re
+from base64 import b64encode
+from datetime import timedelta
+
+from django.db.models import F
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from api.filters import RECIPE_ORDERINGS
+from api.metrics import QueryBudgetError, registry
+from api.serializers import FavoriteSerializer, ShoppingCartSerializer
+
+from recipes.models import (CatalogVersion, Favorite, Ingredient, Recipe,
+                            RecipeIngredient, ShoppingCart, Tag)
+from users.models import Follow, User
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class StrictBudgetTestCase(APITestCase):
+    pass
+
+
+class RecipeQueriesTest(StrictBudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='reader@example.com', username='reader', password='pass')
+        author = User.objects.create_user(
+            email='author@example.com', username='author', password='pass')
+        tags = [Tag.objects.create(name=f'Тег {index}', slug=f'tag{index}')
+                for index in range(3)]
+        ingredients = [
+            Ingredient.objects.create(name=f'Ингредиент {index}',
+                                      measurement_unit='г')
+            for index in range(5)]
+        for index in range(25):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {index}',
+                image='recipes/static/recipe.jpg', text='Описание',
+                cooking_time=10)
+            recipe.tags.set(tags[:2])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=index + 1)
+                for ingredient in ingredients[:3])
+        cls.recipe = recipe
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_list_queries_do_not_depend_on_page_size(self):
+        for limit in (2, 20):
+            with self.subTest(limit=limit), self.assertNumQueries(5):
+                response = self.client.get(reverse('api:recipes-list'),
+                                           {'limit': limit})
+            self.assertEqual(len(response.data['results']), limit)
+
+    def test_detail_queries(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                reverse('api:recipes-detail', args=(self.recipe.id,)))
+        self.assertEqual(len(response.data['ingredients']), 3)
+        self.assertEqual(len(response.data['tags']), 2)
+        self.assertFalse({'search_vector', 'favorites_count',
+                          'trending_score'} & set(response.data))
+
+
+class CatalogCacheTest(StrictBudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+
+    def test_version_change_from_another_process_invalidates(self):
+        url = reverse('api:tags-list')
+        first = self.client.get(url)
+        Tag.objects.filter(pk=self.tag.pk).update(name='Обед')
+        self.assertEqual(self.client.get(url)['ETag'], first['ETag'])
+        CatalogVersion.objects.filter(label='recipes.tag').update(
+            version='changed')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response.json()[0]['name'], 'Обед')
+
+
+class ShoppingListCacheTest(StrictBudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='buyer@example.com', username='buyer', password='pass')
+        cls.token = Token.objects.create(user=cls.user)
+        cls.recipes = []
+        for index, name in enumerate(('Соль', 'Сахар')):
+            recipe = Recipe.objects.create(
+                author=cls.user, name=f'Рецепт {index}',
+                image='recipes/static/recipe.jpg', text='Описание',
+                cooking_time=10)
+            RecipeIngredient.objects.create(
+                recipe=recipe, amount=5,
+                ingredient=Ingredient.objects.create(
+                    name=name, measurement_unit='г'))
+            cls.recipes.append(recipe)
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def download(self):
+        response = self.client.get(
+            reverse('api:recipes-download-shopping-cart'), {'format': 'json'})
+        return [item['name'] for item in
+                json.loads(b''.join(response.streaming_content))]
+
+    def test_cart_change_from_another_process_invalidates(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipes[0])
+        self.assertEqual(self.download(), ['Соль'])
+        ShoppingCart.objects.bulk_create(
+            [ShoppingCart(user=self.user, recipe=self.recipes[1])])
+        self.assertEqual(self.download(), ['Соль'])
+        User.objects.filter(pk=self.user.pk).update(
+            cart_version=F('cart_version') + 1)
+        self.assertEqual(self.download(), ['Сахар', 'Соль'])
+
+
+class InstrumentationTest(StrictBudgetTestCase):
+    server_timing = re.compile(
+        r'db;dur=[\d.]+;desc="(\d+) queries", '
+        r'serialize;dur=[\d.]+, total;dur=[\d.]+')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='pass',
+            is_staff=True)
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user', password='pass')
+        Tag.objects.create(name='Завтрак', slug='breakfast')
+
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def test_server_timing_header(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:recipes-list'))
+        match = self.server_timing.fullmatch(response['Server-Timing'])
+        self.assertIsNotNone(match)
+        self.assertEqual(match.group(1), '1')
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.get(reverse('api:tags-list'))
+        self.client.get(reverse('api:tags-list'))
+        metrics = registry.as_dict()
+        self.assertEqual(list(metrics), ['TagViewSet.list'])
+        self.assertEqual(metrics['TagViewSet.list']['queries']['count'], 2)
+
+    def test_budget_overrun_raises_in_strict_mode(self):
+        with override_settings(QUERY_BUDGETS={'RecipeViewSet.list': 0}):
+            with self.assertRaisesMessage(QueryBudgetError,
+                                          'RecipeViewSet.list: 1'):
+                self.client.get(reverse('api:recipes-list'))
+
+    @override_settings(QUERY_BUDGET_STRICT=False,
+                       QUERY_BUDGETS={'RecipeViewSet.list': 0})
+    def test_budget_overrun_is_logged_otherwise(self):
+        with self.assertLogs('api.metrics', 'ERROR'):
+            response = self.client.get(reverse('api:recipes-list'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_are_open_to_local_requests(self):
+        self.client.get(reverse('api:tags-list'))
+        response = self.client.get(reverse('api:metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('TagViewSet.list', response.json())
+
+    def test_metrics_are_closed_to_remote_users(self):
+        url = reverse('api:metrics')
+        self.assertEqual(
+            self.client.get(url, REMOTE_ADDR='10.0.0.1').status_code, 401)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(
+            self.client.get(url, REMOTE_ADDR='10.0.0.1').status_code, 403)
+        self.assertEqual(
+            self.client.delete(url, REMOTE_ADDR='10.0.0.1').status_code, 403)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(
+            self.client.get(url, REMOTE_ADDR='10.0.0.1').status_code, 200)
+        self.assertEqual(
+            self.client.delete(url, REMOTE_ADDR='10.0.0.1').status_code, 204)
+        self.assertEqual(list(registry.as_dict()), ['MetricsView.delete'])
+
+
+class RecipeCursorPaginationTest(StrictBudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            email='author@example.com', username='author', password='pass')
+        now = timezone.now()
+        for index in range(10):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {index}',
+                image='recipes/static/recipe.jpg', text='Описание',
+                cooking_time=10)
+            Recipe.objects.filter(pk=recipe.pk).update(
+                pub_date=now - timedelta(days=index % 3),
+                favorites_count=index % 2)
+
+    def get_page(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_walk_forward_and_backward(self):
+        for ordering in ('newest', 'popular'):
+            with self.subTest(ordering=ordering):
+                expected = list(Recipe.objects.order_by(
+                    *RECIPE_ORDERINGS[ordering]).values_list('id', flat=True))
+                page = self.get_page(reverse('api:recipes-list'), {
+                    'pagination': 'cursor', 'ordering': ordering,
+                    'limit': 3})
+                self.assertIsNone(page['previous'])
+                pages = [[recipe['id'] for recipe in page['results']]]
+                while page['next']:
+                    page = self.get_page(page['next'])
+                    pages.append([recipe['id'] for recipe in page['results']])
+                self.assertEqual(sum(pages, []), expected)
+                backward = [[recipe['id'] for recipe in page['results']]]
+                while page['previous']:
+                    page = self.get_page(page['previous'])
+                    backward.append(
+                        [recipe['id'] for recipe in page['results']])
+                self.assertEqual(backward[::-1], pages)
+
+    def test_count_on_request(self):
+        url = reverse('api:recipes-list')
+        page = self.get_page(url, {'pagination': 'cursor', 'limit': 3})
+        self.assertNotIn('count', page)
+        page = self.get_page(url, {'pagination': 'cursor', 'limit': 3,
+                                   'count': 'true'})
+        self.assertEqual(page['count'], 10)
+        self.assertEqual(len(page['results']), 3)
+
+    def test_malformed_cursor(self):
+        url = reverse('api:recipes-list')
+        for cursor in ('garbage', b64encode(b'p=1').decode(),
+                       b64encode(b'p=x&p=1').decode()):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+class ToggleActionsTest(StrictBudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='reader@example.com', username='reader', password='pass')
+        cls.token = Token.objects.create(user=cls.user)
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author', password='pass')
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Рецепт',
+            image='recipes/static/recipe.jpg', text='Описание',
+            cooking_time=10)
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def recipe_url(self, action, pk=None):
+        return reverse(f'api:recipes-{action}', args=(pk or self.recipe.pk,))
+
+    def assert_toggle(self, url, duplicate_error, value, added, removed):
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(value(), added)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), duplicate_error)
+        self.assertEqual(value(), added)
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(value(), removed)
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(value(), removed)
+
+    def test_favorite(self):
+        recipes = Recipe.objects.filter(pk=self.recipe.pk)
+        self.assert_toggle(
+            self.recipe_url('favorite'),
+            {'user': [FavoriteSerializer.duplicate_error]},
+            lambda: recipes.values_list('favorites_count', flat=True).get(),
+            added=1, removed=0)
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_shopping_cart(self):
+        users = User.objects.filter(pk=self.user.pk)
+        version = self.user.cart_version
+        self.assert_toggle(
+            self.recipe_url('shopping-cart'),
+            {'user': [ShoppingCartSerializer.duplicate_error]},
+            lambda: users.values_list('cart_version', flat=True).get(),
+            added=version + 1, removed=version + 2)
+        self.assertFalse(ShoppingCart.objects.exists())
+
+    def test_subscribe(self):
+        authors = User.objects.filter(pk=self.author.pk)
+        self.assert_toggle(
+            reverse('api:users-subscribe', args=(self.author.pk,)),
+            {'error': 'Вы уже подписаны на автора.'},
+            lambda: authors.values_list('followers_count', flat=True).get(),
+            added=1, removed=0)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_missing_recipe(self):
+        missing = Recipe.objects.order_by('pk').last().pk + 1
+        for action in ('favorite', 'shopping-cart'):
+            with self.subTest(action=action):
+                response = self.client.post(self.recipe_url(action, missing))
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.json()), ['recipe'])
+                response = self.client.delete(
+                    self.recipe_url(action, missing))
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            User.objects.get(pk=self.user.pk).cart_version,
+            self.user.cart_version)
+
+    def test_missing_author(self):
+        url = reverse('api:users-subscribe',
+                      args=(User.objects.order_by('pk').last().pk + 1,))
+        self.assertEqual(self.client.post(url).status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
@@ -1,23 +1,32 @@
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
-from .paginations import LimitPageNumberPagination
+from .mixins import CatalogCacheMixin
+from .paginations import SwitchablePaginationMixin
+from .renderers import SHOPPING_LIST_RENDERERS
 from .serializers import (CustomUserCreateSerializer, CustomUserSerializer,
-                          FollowSerializer, ChangePasswordSerializer,
+                          SubscriptionSerializer, ChangePasswordSerializer,
                           TagSerializer,
                           IngredientSerializer, RecipeSerializer,
                           RecipeReadSerializer, FavoriteSerializer,
-                          ShoppingCartSerializer)
+                          ShoppingCartSerializer, RecipeShortShowSerializer,
+                          get_recipes_limit)
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
-from .premissions import IsAuthorOrReadOnly
-from .filters import AuthorAndTagFilter, IngredientFilter
-from django.http.response import HttpResponse
-from django.db.models import Sum
+from .metrics import registry
+from .premissions import IsAdminOrLocal, IsAuthorOrReadOnly
+from .filters import AuthorAndTagFilter, IngredientFilter, RECIPE_ORDERINGS
+from django.http.response import StreamingHttpResponse
+from django.db.models import Prefetch
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.relations import PrimaryKeyRelatedField
 
+from recipes.ingredient_index import ingredient_index
+from recipes.shopping_list import get_shopping_list
+from recipes.writes import delete_one, insert_ignore
 from recipes.models import (Recipe, Tag, Ingredient, RecipeIngredient,
                             Favorite, ShoppingCart)
 from users.models import Follow
@@ -26,10 +35,11 @@ from django_filters.rest_framework import DjangoFilterBackend
 User = get_user_model()
 
 
-class CustomUserViewSet(UserViewSet):
-    queryset = User.objects.all()
+class CustomUserViewSet(SwitchablePaginationMixin, UserViewSet):
+    queryset = User.objects.order_by('id')
     serializer_class = CustomUserCreateSerializer
-    pagination_class = LimitPageNumberPagination
+    cursor_ordering = ('id',)
+    lookup_value_regex = r'\d+'
 
     def get_serializer_class(self):
         if self.action in ['list', 'retrieve']:
@@ -39,10 +49,17 @@ class CustomUserViewSet(UserViewSet):
     @action(detail=False, methods=('GET',),
             permission_classes=[IsAuthenticated])
     def subscriptions(self, request):
-        user = self.request.user
-        queryset = Follow.objects.filter(user=user)
+        recipes = Recipe.objects.all()
+        limit = get_recipes_limit(request)
+        if limit is not None:
+            recipes = recipes.latest_per_author(limit)
+        queryset = User.objects.filter(
+            id__in=Follow.objects.filter(user=request.user).values('author')
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='recipes_preview')
+        ).order_by('id')
         page = self.paginate_queryset(queryset)
-        serializer = FollowSerializer(
+        serializer = SubscriptionSerializer(
             page, many=True, context={'request': request}
         )
         return self.get_paginated_response(serializer.data)
@@ -52,30 +69,22 @@ class CustomUserViewSet(UserViewSet):
         permission_classes=(IsAuthenticated,))
     def subscribe(self, request, id):
         user = request.user
-        author = get_object_or_404(User, id=id)
+        authors = User.objects.filter(id=id)
         if request.method == 'POST':
-            serializer = FollowSerializer(
-                Follow.objects.create(user=user, author=author),
-                context={'request': request})
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        Follow.objects.filter(user=user, author=author).delete()
-        return Response('Успешная отписка', status=status.HTTP_204_NO_CONTENT)
-
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-
-        is_subscribed = False
-        if request.user.is_authenticated:
-            user = request.user
-            author = instance
-            is_subscribed = Follow.objects.filter(user=user,
-                                                  author=author).exists()
-
-        data = serializer.data
-        data['is_subscribed'] = is_subscribed
-
-        return Response(data)
+            if insert_ignore(Follow(user=user, author_id=id), authors):
+                serializer = SubscriptionSerializer(
+                    authors.get(), context={'request': request})
+                return Response(serializer.data,
+                                status=status.HTTP_201_CREATED)
+            get_object_or_404(authors)
+            return Response({'error': 'Вы уже подписаны на автора.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if delete_one(Follow, user=user, author_id=id):
+            return Response('Успешная отписка',
+                            status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(authors)
+        return Response({'error': 'Вы не подписаны на автора.'},
+                        status=status.HTTP_400_BAD_REQUEST)
 
     @action(
         methods=('POST',),
@@ -90,72 +99,94 @@ class CustomUserViewSet(UserViewSet):
                         status=status.HTTP_200_OK)
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(CatalogCacheMixin, ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(CatalogCacheMixin, ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (DjangoFilterBackend, )
     filterset_class = IngredientFilter
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name is None:
+            return super().list(request, *args, **kwargs)
+        return Response(ingredient_index.search(
+            name, request.query_params.get('measurement_unit')))
 
-class RecipeViewSet(ModelViewSet):
+
+class RecipeViewSet(SwitchablePaginationMixin, ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     filterset_class = AuthorAndTagFilter
     filter_backends = (DjangoFilterBackend, )
     permission_classes = [IsAuthorOrReadOnly]
-    pagination_class = LimitPageNumberPagination
-
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = RecipeSerializer(instance)
-
-        if request.method == 'PATCH':
-            partial = kwargs.pop('partial', False)
-            serializer = RecipeSerializer(instance, data=request.data,
-                                          partial=partial)
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(serializer.data)
-
-        return Response(serializer.data)
+    cursor_ordering = ('-pub_date', '-id')
+    cursor_actions = ('feed',)
+    page_number_params = ('search',)
+    lookup_value_regex = r'\d+'
+
+    def get_queryset(self):
+        return Recipe.objects.select_related('author').defer(
+            'search_vector'
+        ).prefetch_related(
+            'tags',
+            Prefetch('recipe',
+                     queryset=RecipeIngredient.objects.select_related(
+                         'ingredient')),
+        ).with_user_flags(self.request.user)
+
+    def get_cursor_ordering(self):
+        return RECIPE_ORDERINGS.get(
+            self.request.query_params.get('ordering'), self.cursor_ordering)
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-    def update(self, request, *args, **kwargs):
-        partial = kwargs.pop('partial', False)
-        instance = self.get_object()
-        serializer = self.get_serializer(instance, data=request.data,
-                                         partial=partial)
-        serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
-        return Response(serializer.data)
-
-    def perform_update(self, serializer):
-        serializer.save()
-
     def get_serializer_class(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'feed']:
             return RecipeReadSerializer
         return RecipeSerializer
 
+    @action(detail=False, methods=('GET',),
+            permission_classes=(IsAuthenticated,))
+    def feed(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            author__in=Follow.objects.filter(
+                user=request.user).values('author'))
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=('GET',))
+    def similar(self, request, pk):
+        recipe = get_object_or_404(Recipe.objects.only('pk'), pk=pk)
+        recipes = Recipe.objects.filter(
+            similar_recipes_of__recipe=recipe
+        ).order_by('-similar_recipes_of__score')
+        serializer = RecipeShortShowSerializer(
+            recipes, many=True, context={'request': request})
+        return Response(serializer.data)
+
     def add_obj(self, request, serializers, pk):
-        data = {'user': request.user.id, 'recipe': pk}
-        serializer = serializers(data=data, context={'request': request})
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        instance = serializers.Meta.model(user=request.user, recipe_id=int(pk))
+        recipes = Recipe.objects.filter(pk=pk)
+        if insert_ignore(instance, recipes):
+            return Response(serializers(instance).data,
+                            status=status.HTTP_201_CREATED)
+        if not recipes.exists():
+            error = PrimaryKeyRelatedField.default_error_messages[
+                'does_not_exist'].format(pk_value=pk)
+            return Response({'recipe': [error]},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({'user': [serializers.duplicate_error]},
+                        status=status.HTTP_400_BAD_REQUEST)
 
     def delete_obj(self, request, model, id):
-        model_instance = model.objects.filter(user=request.user.id,
-                                              recipe__id=id)
-        if model_instance.exists():
-            model_instance.delete()
+        if delete_one(model, user=request.user, recipe_id=id):
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response({'error': 'Такого рецепта нет в списке.'
                          }, status=status.HTTP_400_BAD_REQUEST)
@@ -175,22 +206,27 @@ class RecipeViewSet(ModelViewSet):
         return self.delete_obj(request, ShoppingCart, pk)
 
     def create_shopping_cart(self, ingredients):
-        shopping_list = 'Список покупок:'
-        for ingredient in ingredients:
-            shopping_list += (
-                f"\n{ingredient['ingredient__name']} "
-                f"({ingredient['ingredient__measurement_unit']}) - "
-                f"{ingredient['ingredient_value']}")
-        file = 'shopping_list.txt'
-        response = HttpResponse(shopping_list, content_type='text/plain')
-        response['Content-Disposition'] = f'attachment; filename="{file}.txt"'
+        renderer = self.request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}')
+        file = f'shopping_list.{renderer.format}'
+        response['Content-Disposition'] = f'attachment; filename="{file}"'
         return response
 
-    @action(detail=False, methods=('GET',))
+    @action(detail=False, methods=('GET',),
+            permission_classes=(IsAuthenticated,),
+            renderer_classes=SHOPPING_LIST_RENDERERS)
     def download_shopping_cart(self, request):
-        ingredients = RecipeIngredient.objects.filter(
-            recipe__shoppingcart__user=request.user
-        ).order_by('ingredient__name').values(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).annotate(ingredient_value=Sum('amount'))
-        return self.create_shopping_cart(ingredients)
+        return self.create_shopping_cart(get_shopping_list(request.user))
+
+
+class MetricsView(APIView):
+    permission_classes = (IsAdminOrLocal,)
+
+    def get(self, request):
+        return Response(registry.as_dict())
+
+    def delete(self, request):
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,108 @@
+import os
+from threading import BoundedSemaphore, Lock
+
+from django.db.backends.postgresql import base
+from psycopg2 import extras, pool
+
+Database = base.Database
+
+pools = {}
+pools_lock = Lock()
+
+
+class ConnectionPool:
+
+    def __init__(self, settings, conn_params):
+        self.timeout = settings.get('TIMEOUT', 10)
+        self.slots = BoundedSemaphore(settings['MAX_SIZE'])
+        self.pool = pool.ThreadedConnectionPool(
+            settings.get('MIN_SIZE', 1), settings['MAX_SIZE'], **conn_params)
+
+    def getconn(self):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise Database.OperationalError(
+                'Все соединения пула заняты дольше {} с'.format(self.timeout))
+        try:
+            return self.pool.getconn()
+        except Exception:
+            self.slots.release()
+            raise
+
+    def putconn(self, connection, close=False):
+        try:
+            self.pool.putconn(connection, close=close or connection.closed)
+        finally:
+            self.slots.release()
+
+
+def get_pool(alias, settings, conn_params):
+    key = (alias, os.getpid())
+    with pools_lock:
+        if key not in pools:
+            pools[key] = ConnectionPool(settings, conn_params)
+        return pools[key]
+
+
+def ping(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            connection.rollback()
+    except Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_enabled = self.settings_dict.get(
+            'CONN_HEALTH_CHECKS', False)
+        self.health_check_done = False
+        self.pool_settings = self.settings_dict.get('POOL')
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_settings:
+            return super().get_new_connection(conn_params)
+        connection_pool = get_pool(self.alias, self.pool_settings,
+                                   conn_params)
+        connection = connection_pool.getconn()
+        if self.health_check_enabled and not ping(connection):
+            connection_pool.putconn(connection, close=True)
+            connection = connection_pool.getconn()
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level)
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        extras.register_default_jsonb(conn_or_curs=connection,
+                                      loads=lambda value: value)
+        return connection
+
+    def _close(self):
+        if self.connection is None or not self.pool_settings:
+            return super()._close()
+        with self.wrap_database_errors:
+            get_pool(self.alias, self.pool_settings,
+                     self.get_connection_params()).putconn(self.connection)
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        if (self.connection is None or not self.health_check_enabled
+                or self.health_check_done):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
@@ -48,8 +48,9 @@ class RecipeAdmin(admin.ModelAdmin):
     list_filter = ('author', 'name', 'tags')
     inlines = (RecipeIngredientAdmin,)
 
+    @admin.display(description='В избранном', ordering='favorites_count')
     def count_favorites(self, obj):
-        return obj.favorite.count()
+        return obj.favorites_count
 
 
 admin.site.register(Favorite)
@@ -0,0 +1,22 @@
+from uuid import uuid4
+
+from recipes.models import CatalogVersion
+
+
+def new_version():
+    return uuid4().hex
+
+
+def get_version(model):
+    return CatalogVersion.objects.get_or_create(
+        label=model._meta.label_lower,
+        defaults={'version': new_version()},
+    )[0].version
+
+
+def bump_version(model):
+    label = model._meta.label_lower
+    version = new_version()
+    if not CatalogVersion.objects.filter(label=label).update(version=version):
+        CatalogVersion.objects.get_or_create(label=label,
+                                             defaults={'version': version})
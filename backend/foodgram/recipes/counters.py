@@ -0,0 +1,22 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def change_counter(queryset, field, delta):
+    queryset.update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def count_subquery(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field).annotate(total=Count('pk')).values('total')
+    ), Value(0))
+
+
+def recount(user_model, recipe_model, favorite_model, follow_model):
+    recipe_model.objects.update(
+        favorites_count=count_subquery(favorite_model.objects, 'recipe'))
+    user_model.objects.update(
+        recipes_count=count_subquery(recipe_model.objects, 'author'),
+        followers_count=count_subquery(follow_model.objects, 'author'),
+    )
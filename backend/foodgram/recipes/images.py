@@ -0,0 +1,70 @@
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from recipes.tasks import run_in_background
+
+THUMBNAIL_SIZES = getattr(settings, 'RECIPE_THUMBNAIL_SIZES', {
+    'small': 128,
+    'medium': 480,
+    'large': 960,
+})
+THUMBNAIL_FORMAT = getattr(settings, 'RECIPE_THUMBNAIL_FORMAT', 'WEBP')
+THUMBNAIL_QUALITY = getattr(settings, 'RECIPE_THUMBNAIL_QUALITY', 80)
+THUMBNAIL_DIR = 'recipes/thumbnails'
+
+
+def thumbnail_name(name, size):
+    extension = THUMBNAIL_FORMAT.lower()
+    return f'{THUMBNAIL_DIR}/{PurePosixPath(name).stem}_{size}.{extension}'
+
+
+def thumbnail_urls(recipe):
+    if not recipe.thumbnails_ready:
+        return {}
+    return {size: default_storage.url(thumbnail_name(recipe.image.name, size))
+            for size in THUMBNAIL_SIZES}
+
+
+def missing_thumbnails(name):
+    return {size: side for size, side in THUMBNAIL_SIZES.items()
+            if not default_storage.exists(thumbnail_name(name, size))}
+
+
+def make_thumbnails(recipe_id, name, overwrite=False):
+    from recipes.models import Recipe
+
+    # Имя файла строится по хешу содержимого, поэтому готовые превью
+    # одинаковой картинки общие для всех рецептов и пересоздавать их
+    # незачем.
+    sizes = THUMBNAIL_SIZES if overwrite else missing_thumbnails(name)
+    if sizes:
+        with default_storage.open(name) as file:
+            image = ImageOps.exif_transpose(Image.open(file))
+            image = image.convert('RGB')
+    for size, side in sizes.items():
+        thumbnail = image.copy()
+        thumbnail.thumbnail((side, side), Image.LANCZOS)
+        buffer = BytesIO()
+        thumbnail.save(buffer, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+        path = thumbnail_name(name, size)
+        default_storage.delete(path)
+        default_storage.save(path, ContentFile(buffer.getvalue()))
+    Recipe.objects.filter(pk=recipe_id, image=name).update(
+        thumbnails_ready=True)
+
+
+def schedule_thumbnails(recipe):
+    from recipes.models import Recipe
+
+    name = recipe.image.name
+    if not missing_thumbnails(name):
+        Recipe.objects.filter(pk=recipe.pk, image=name).update(
+            thumbnails_ready=True)
+        recipe.thumbnails_ready = True
+        return None
+    return run_in_background(make_thumbnails, recipe.pk, name)
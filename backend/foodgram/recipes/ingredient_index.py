@@ -0,0 +1,54 @@
+import threading
+from bisect import bisect_left
+
+from recipes.catalog import get_version
+from recipes.models import Ingredient
+
+
+class IngredientIndex:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.entries = ([], [])
+
+    def build(self, version):
+        ingredients = sorted(
+            Ingredient.objects.values('id', 'name', 'measurement_unit'),
+            key=lambda item: (item['name'].lower(), item['id']),
+        )
+        keys = [item['name'].lower() for item in ingredients]
+        self.entries = (keys, ingredients)
+        self.version = version
+
+    def get_entries(self):
+        version = get_version(Ingredient)
+        if self.version != version:
+            with self.lock:
+                if self.version != version:
+                    self.build(version)
+        return self.entries
+
+    def search(self, name, measurement_unit=None):
+        keys, items = self.get_entries()
+        name = name.lower()
+        substring = []
+        start = bisect_left(keys, name)
+        end = start
+        while end < len(keys) and keys[end].startswith(name):
+            end += 1
+        prefix = items[start:end]
+        if name:
+            substring = [
+                item for key, item in zip(keys[:start] + keys[end:],
+                                          items[:start] + items[end:])
+                if name in key
+            ]
+        result = prefix + substring
+        if measurement_unit is not None:
+            result = [item for item in result
+                      if item['measurement_unit'] == measurement_unit]
+        return result
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,28 @@
+from django.core.management import BaseCommand
+
+from recipes.similar import (SIMILAR_MAX_DF, SIMILAR_TOP_K, build_similar,
+                             refresh_similar)
+
+
+class Command(BaseCommand):
+    help = 'Builds the similar recipes index from ingredient overlap'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipe', type=int, action='append',
+                            help='Обновить только указанные рецепты')
+        parser.add_argument('--top-k', type=int, default=SIMILAR_TOP_K)
+        parser.add_argument('--max-df', type=float, default=SIMILAR_MAX_DF,
+                            help='Не учитывать ингредиенты, которые есть '
+                                 'в большей доле рецептов')
+
+    def handle(self, *args, **options):
+        if options['recipe']:
+            for recipe_id in options['recipe']:
+                refresh_similar(recipe_id, options['top_k'],
+                                options['max_df'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Обновлено рецептов: {len(options["recipe"])}'))
+            return
+        recipes, rows = build_similar(options['top_k'], options['max_df'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Рецептов: {recipes}, связей: {rows}'))
@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand
+
+from recipes.images import make_thumbnails
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Builds missing recipe image thumbnails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересобрать превью для всех рецептов')
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(thumbnails_ready=False)
+        built = 0
+        for recipe_id, name in recipes.values_list('id', 'image').iterator():
+            try:
+                make_thumbnails(recipe_id, name, overwrite=options['all'])
+            except (OSError, ValueError) as error:
+                self.stderr.write(f'Рецепт {recipe_id}: {error}')
+                continue
+            built += 1
+        self.stdout.write(self.style.SUCCESS(f'Готово превью: {built}'))
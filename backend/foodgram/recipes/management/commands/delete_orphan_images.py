@@ -0,0 +1,47 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from recipes.images import THUMBNAIL_DIR, THUMBNAIL_SIZES, thumbnail_name
+from recipes.models import Recipe
+from recipes.storage import recipe_image_storage
+
+
+class Command(BaseCommand):
+    help = 'Deletes recipe images and thumbnails no recipe refers to'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать, что будет удалено')
+        parser.add_argument('--min-age', type=int, default=3600,
+                            help='Не трогать файлы моложе N секунд')
+
+    def handle(self, *args, **options):
+        storage = recipe_image_storage
+        references = Counter(
+            Recipe.objects.exclude(image='').values_list('image', flat=True))
+        referenced = set(references)
+        for name in references:
+            referenced.update(thumbnail_name(name, size)
+                              for size in THUMBNAIL_SIZES)
+        directory = Recipe._meta.get_field('image').upload_to.rstrip('/')
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+        deleted = 0
+        for folder in (directory, THUMBNAIL_DIR):
+            if not storage.exists(folder):
+                continue
+            for filename in storage.listdir(folder)[1]:
+                name = f'{folder}/{filename}'
+                if (name in referenced
+                        or storage.get_modified_time(name) > cutoff):
+                    continue
+                if not options['dry_run']:
+                    storage.delete(name)
+                deleted += 1
+                self.stdout.write(name)
+        shared = sum(1 for count in references.values() if count > 1)
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено файлов: {deleted}, '
+            f'используются несколькими рецептами: {shared}'))
@@ -1,21 +1,101 @@
 import csv
-from django.core.management import BaseCommand
+import json
+import sys
+from itertools import islice
+from pathlib import Path
+
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.catalog import bump_version
 from recipes.models import Ingredient
 
+DEFAULT_FILE = Path(__file__).resolve().parents[2] / 'data' / 'ingredients.csv'
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if row:
+            name, measurement_unit = row
+            yield name.strip(), measurement_unit.strip()
+
+
+def read_json(file):
+    for item in json.load(file):
+        yield item['name'].strip(), item['measurement_unit'].strip()
+
+
+READERS = {'csv': read_csv, 'json': read_json}
+
 
 class Command(BaseCommand):
-    help = "Loads data from ingredients.csv"
+    help = ('Loads ingredients from CSV or JSON files '
+            '(recipes/data/ingredients.csv by default, "-" for stdin)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=[str(DEFAULT_FILE)])
+        parser.add_argument('--format', choices=READERS,
+                            help='Формат файла, по умолчанию по расширению')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--update-units', action='store_true',
+                            help='Обновлять единицы измерения '
+                                 'у существующих ингредиентов')
 
     def handle(self, *args, **options):
-        file_name = 'recipes/data/ingredients.csv'
-        with open(file_name, 'r', encoding='utf-8') as file:
-            file = csv.reader(file)
-            for ing in file:
-                name, measurement_unit = ing
-                try:
-                    Ingredient.objects.get_or_create(
-                        name=name,
-                        measurement_unit=measurement_unit
-                    )
-                except Exception:
-                    print(f'Ингрединет {ing} есть в базе')
+        self.stats = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        self.existing = dict(
+            Ingredient.objects.values_list('name', 'measurement_unit'))
+        for path in options['paths']:
+            rows = self.read(path, options['format'])
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                self.load_batch(batch, options['update_units'])
+        if self.stats['inserted'] or self.stats['updated']:
+            bump_version(Ingredient)
+        self.stdout.write(self.style.SUCCESS(
+            'Добавлено: {inserted}, обновлено: {updated}, '
+            'пропущено: {skipped}'.format(**self.stats)))
+
+    def read(self, path, file_format):
+        if file_format is None:
+            file_format = 'json' if path.endswith('.json') else 'csv'
+        if path == '-':
+            yield from READERS[file_format](sys.stdin)
+            return
+        try:
+            with open(path, encoding='utf-8') as file:
+                yield from READERS[file_format](file)
+        except OSError as error:
+            raise CommandError(f'Не удалось прочитать {path}: {error}')
+        except (KeyError, ValueError) as error:
+            raise CommandError(f'Некорректные данные в {path}: {error}')
+
+    @transaction.atomic
+    def load_batch(self, batch, update_units):
+        new, changed = {}, {}
+        for name, measurement_unit in batch:
+            current = self.existing.get(name)
+            if name in new or current == measurement_unit:
+                self.stats['skipped'] += 1
+            elif current is None:
+                new[name] = measurement_unit
+            elif update_units:
+                changed[name] = measurement_unit
+            else:
+                self.stats['skipped'] += 1
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=name, measurement_unit=measurement_unit)
+             for name, measurement_unit in new.items()],
+            ignore_conflicts=True,
+        )
+        if changed:
+            ingredients = list(Ingredient.objects.filter(name__in=changed))
+            for ingredient in ingredients:
+                ingredient.measurement_unit = changed[ingredient.name]
+            Ingredient.objects.bulk_update(ingredients, ['measurement_unit'])
+        self.existing.update(new)
+        self.existing.update(changed)
+        self.stats['inserted'] += len(new)
+        self.stats['updated'] += len(changed)
@@ -0,0 +1,13 @@
+from django.core.management import BaseCommand
+
+from recipes.counters import recount
+from recipes.models import Favorite, Recipe
+from users.models import Follow, User
+
+
+class Command(BaseCommand):
+    help = 'Recounts favorites, recipes and followers counters'
+
+    def handle(self, *args, **options):
+        recount(User, Recipe, Favorite, Follow)
+        self.stdout.write(self.style.SUCCESS('Счетчики пересчитаны'))
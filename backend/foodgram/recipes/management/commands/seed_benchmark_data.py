@@ -0,0 +1,210 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.counters import recount
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from recipes.search import update_search_vector
+from recipes.similar import build_similar
+from recipes.storage import recipe_image_storage
+from recipes.trending import update_trending
+from users.models import Follow, User
+
+USERNAME_PREFIX = 'bench_'
+PLACEHOLDER_IMAGE = Path(__file__).resolve().parents[2] / 'static' / '2.jpg'
+TAGS = (
+    ('Завтрак', 'breakfast', '#E26C2D'),
+    ('Обед', 'lunch', '#49B64E'),
+    ('Ужин', 'dinner', '#8775D2'),
+    ('Десерт', 'dessert', '#F2C94C'),
+    ('Выпечка', 'bakery', '#BB6BD9'),
+)
+
+
+def zipf_weights(size, exponent):
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, size + 1)))
+
+
+def weighted_sample(rng, population, cum_weights, k):
+    k = min(k, len(population))
+    chosen = {}
+    for _ in range(k * 4):
+        if len(chosen) >= k:
+            break
+        chosen.update(dict.fromkeys(rng.choices(
+            population, cum_weights=cum_weights, k=k - len(chosen))))
+    return list(chosen)
+
+
+class Command(BaseCommand):
+    help = ('Generates skewed synthetic users, recipes, follows, favorites '
+            'and carts for benchmarks')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--ingredients', type=int, nargs=2,
+                            default=(3, 12), metavar=('MIN', 'MAX'),
+                            help='Ингредиентов в рецепте')
+        parser.add_argument('--follows', type=int, default=20,
+                            help='Подписок у пользователя в среднем')
+        parser.add_argument('--favorites', type=int, default=30,
+                            help='Избранных рецептов в среднем')
+        parser.add_argument('--cart', type=int, default=8,
+                            help='Рецептов в корзине в среднем')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней распределить публикации')
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Показатель распределения Ципфа')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--clear', action='store_true',
+                            help='Удалить ранее созданные данные')
+        parser.add_argument('--skip-derived', action='store_true',
+                            help='Не пересчитывать тренды, поиск '
+                                 'и похожие рецепты')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        benchmark_users = User.objects.filter(
+            username__startswith=USERNAME_PREFIX)
+        if options['clear']:
+            benchmark_users.delete()
+        elif benchmark_users.exists():
+            raise CommandError('Данные для бенчмарков уже созданы, '
+                               'используйте --clear')
+        if not Ingredient.objects.exists():
+            call_command('load_ingredients_csv', stdout=self.stdout)
+        with transaction.atomic():
+            users = self.create_users(options['users'])
+            recipes = self.create_recipes(users, options)
+            self.create_follows(users, options['follows'], options['skew'])
+            favorites = self.create_marks(Favorite, users, recipes,
+                                          options['favorites'],
+                                          options['skew'])
+            carts = self.create_marks(ShoppingCart, users, recipes,
+                                      options['cart'], options['skew'])
+            recount(User, Recipe, Favorite, Follow)
+        if not options['skip_derived']:
+            update_search_vector([recipe_id for recipe_id, _ in recipes])
+            update_trending(full=True)
+            build_similar()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователей: {len(users)}, рецептов: {len(recipes)}, '
+            f'в избранном: {favorites}, в корзинах: {carts}'))
+
+    def create_users(self, count):
+        password = make_password('benchmark')
+        User.objects.bulk_create(
+            [User(email=f'{USERNAME_PREFIX}{index}@example.com',
+                  username=f'{USERNAME_PREFIX}{index}',
+                  first_name='Бенчмарк', last_name=str(index),
+                  password=password)
+             for index in range(count)],
+            batch_size=self.batch_size,
+        )
+        return list(User.objects.filter(
+            username__startswith=USERNAME_PREFIX
+        ).order_by('id').values_list('id', flat=True))
+
+    def create_recipes(self, users, options):
+        rng = self.rng
+        with open(PLACEHOLDER_IMAGE, 'rb') as file:
+            image = recipe_image_storage.save(
+                f'recipes/static/{PLACEHOLDER_IMAGE.name}', File(file))
+        ingredients = list(Ingredient.objects.values_list('id', 'name'))
+        rng.shuffle(ingredients)
+        ingredient_weights = zipf_weights(len(ingredients), options['skew'])
+        author_weights = zipf_weights(len(users), options['skew'])
+        authors = rng.choices(users, cum_weights=author_weights,
+                              k=options['recipes'])
+        start = Recipe.objects.count()
+        recipes, contents = [], []
+        for index, author in enumerate(authors, start):
+            chosen = weighted_sample(
+                rng, ingredients, ingredient_weights,
+                rng.randint(*options['ingredients']))
+            names = [name for _, name in chosen]
+            recipes.append(Recipe(
+                author_id=author,
+                name=f'{names[0].capitalize()} №{index}',
+                image=image,
+                text='Понадобится: {}.'.format(', '.join(names)),
+                cooking_time=rng.randint(5, 180),
+            ))
+            contents.append([ingredient_id for ingredient_id, _ in chosen])
+        Recipe.objects.bulk_create(recipes, batch_size=self.batch_size)
+        ids = list(Recipe.objects.filter(
+            author__username__startswith=USERNAME_PREFIX
+        ).order_by('id').values_list('id', flat=True))
+        published = [
+            self.now - timedelta(days=options['days'] * rng.random() ** 2)
+            for _ in ids]
+        Recipe.objects.bulk_update(
+            [Recipe(pk=recipe_id, pub_date=pub_date)
+             for recipe_id, pub_date in zip(ids, published)],
+            ['pub_date'], batch_size=self.batch_size)
+        RecipeIngredient.objects.bulk_create(
+            [RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient,
+                              amount=rng.randint(1, 500))
+             for recipe_id, ingredient_ids in zip(ids, contents)
+             for ingredient in ingredient_ids],
+            batch_size=self.batch_size)
+        tags = self.create_tags()
+        Recipe.tags.through.objects.bulk_create(
+            [Recipe.tags.through(recipe_id=recipe_id, tag_id=tag)
+             for recipe_id in ids
+             for tag in rng.sample(tags, rng.randint(1, 2))],
+            batch_size=self.batch_size)
+        return list(zip(ids, published))
+
+    def create_tags(self):
+        return [Tag.objects.get_or_create(
+            slug=slug, defaults={'name': name, 'color': color})[0].id
+            for name, slug, color in TAGS]
+
+    def create_follows(self, users, average, skew):
+        weights = zipf_weights(len(users), skew)
+        follows = []
+        for user in users:
+            authors = weighted_sample(
+                self.rng, users, weights,
+                int(self.rng.expovariate(1 / average)) if average else 0)
+            follows.extend(Follow(user_id=user, author_id=author)
+                           for author in authors if author != user)
+        Follow.objects.bulk_create(follows, batch_size=self.batch_size)
+
+    def create_marks(self, model, users, recipes, average, skew):
+        rng = self.rng
+        ranked = recipes[:]
+        rng.shuffle(ranked)
+        weights = zipf_weights(len(ranked), skew)
+        marks = []
+        for user in users:
+            chosen = weighted_sample(
+                rng, ranked, weights,
+                int(rng.expovariate(1 / average)) if average else 0)
+            marks.extend(model(user_id=user, recipe_id=recipe_id)
+                         for recipe_id, _ in chosen)
+        model.objects.bulk_create(marks, batch_size=self.batch_size)
+        published = dict(recipes)
+        created = [
+            model(pk=pk, created=published[recipe_id] + (
+                self.now - published[recipe_id]) * rng.random())
+            for pk, recipe_id in model.objects.filter(
+                user__username__startswith=USERNAME_PREFIX
+            ).values_list('pk', 'recipe_id')]
+        model.objects.bulk_update(created, ['created'],
+                                  batch_size=self.batch_size)
+        return len(marks)
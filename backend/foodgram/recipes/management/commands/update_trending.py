@@ -0,0 +1,17 @@
+from django.core.management import BaseCommand
+
+from recipes.trending import update_trending
+
+
+class Command(BaseCommand):
+    help = 'Updates recipe trending scores with recent favorites and carts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Пересчитать с нуля за все окно')
+
+    def handle(self, *args, **options):
+        full, updated = update_trending(options['full'])
+        mode = 'полный' if full else 'инкрементальный'
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчет ({mode}): обновлено рецептов {updated}'))
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.19 on 2026-10-17 05:56
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_thumbnails_ready'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=recipes.storage.HashedFileSystemStorage(), upload_to='recipes/static/', verbose_name='Картинка'),
+        ),
+    ]
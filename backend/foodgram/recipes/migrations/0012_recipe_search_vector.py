@@ -0,0 +1,50 @@
+# Generated by Django 3.2.19 on 2026-10-17 05:59
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_INDEX = 'recipe_search_vector_idx'
+
+
+def add_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX {SEARCH_INDEX} ON recipes_recipe '
+        f'USING gin (search_vector)'
+    )
+    schema_editor.execute(
+        """
+        UPDATE recipes_recipe AS recipe SET search_vector =
+            setweight(to_tsvector('russian', recipe.name), 'A')
+            || setweight(to_tsvector('russian', coalesce((
+                SELECT string_agg(ingredient.name, ' ')
+                FROM recipes_recipeingredient AS recipe_ingredient
+                JOIN recipes_ingredient AS ingredient
+                    ON ingredient.id = recipe_ingredient.ingredient_id
+                WHERE recipe_ingredient.recipe_id = recipe.id
+            ), '')), 'B')
+            || setweight(to_tsvector('russian', recipe.text), 'C')
+        """
+    )
+
+
+def remove_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {SEARCH_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_similarrecipe'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(add_search_index, remove_search_index),
+    ]
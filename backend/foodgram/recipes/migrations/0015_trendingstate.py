@@ -0,0 +1,25 @@
+# Generated by Django 3.2.19 on 2026-10-17 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_recipeingredient_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('watermark', models.DateTimeField(verbose_name='События учтены до')),
+                ('epoch', models.DateTimeField(verbose_name='Начало отсчета весов')),
+            ],
+            options={
+                'verbose_name': 'Состояние трендов',
+                'verbose_name_plural': 'Состояние трендов',
+            },
+        ),
+    ]
@@ -1,5 +1,8 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import BooleanField, Exists, OuterRef, Subquery, Value
 from django.core.validators import MinValueValidator
+from recipes.storage import recipe_image_storage
 from users.models import User
 
 
@@ -49,6 +52,28 @@ class Ingredient(models.Model):
         verbose_name_plural = 'Ингридиенты'
 
 
+class RecipeQuerySet(models.QuerySet):
+
+    def with_user_flags(self, user):
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+        )
+
+    def latest_per_author(self, limit):
+        latest = Recipe.objects.filter(
+            author=OuterRef('author')
+        ).order_by('-pub_date', '-id').values('pk')[:limit]
+        return self.filter(pk__in=Subquery(latest))
+
+
 class Recipe(models.Model):
     tags = models.ManyToManyField(
         Tag,
@@ -73,6 +98,12 @@ class Recipe(models.Model):
     image = models.ImageField(
         verbose_name='Картинка',
         upload_to='recipes/static/',
+        storage=recipe_image_storage,
+    )
+    thumbnails_ready = models.BooleanField(
+        verbose_name='Превью готовы',
+        default=False,
+        editable=False,
     )
     text = models.TextField(
         verbose_name='Описание'
@@ -80,8 +111,38 @@ class Recipe(models.Model):
     cooking_time = models.IntegerField(
         verbose_name='Время приготовления',
     )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+        auto_now_add=True,
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False,
+        db_index=True,
+    )
+    trending_score = models.FloatField(
+        verbose_name='Популярность за последнее время',
+        default=0,
+        editable=False,
+        db_index=True,
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='recipe_pub_date_id_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='recipe_author_pub_date_idx'),
+        ]
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
@@ -105,6 +166,12 @@ class RecipeIngredient(models.Model):
     ])
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'ingredient'],
+                name='recipes_recipeingredient_unique',
+            )
+        ]
         verbose_name = 'Ингредиент в рецепте'
         verbose_name_plural = 'Ингредиенты в рецепте'
 
@@ -112,6 +179,11 @@ class RecipeIngredient(models.Model):
 class FavoriteAndShoppingCart(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True,
+        db_index=True,
+    )
 
     class Meta:
         abstract = True
@@ -137,3 +209,56 @@ class ShoppingCart(FavoriteAndShoppingCart):
         default_related_name = 'shoppingcart'
         verbose_name = 'Корзина'
         verbose_name_plural = 'Корзина'
+
+
+class CatalogVersion(models.Model):
+    label = models.CharField(
+        max_length=100,
+        primary_key=True,
+        verbose_name='Модель',
+    )
+    version = models.CharField(max_length=32, verbose_name='Версия')
+
+    class Meta:
+        verbose_name = 'Версия справочника'
+        verbose_name_plural = 'Версии справочников'
+
+
+class TrendingState(models.Model):
+    watermark = models.DateTimeField(verbose_name='События учтены до')
+    epoch = models.DateTimeField(verbose_name='Начало отсчета весов')
+
+    class Meta:
+        verbose_name = 'Состояние трендов'
+        verbose_name_plural = 'Состояние трендов'
+
+
+class SimilarRecipe(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        verbose_name='Рецепт',
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_recipes_of',
+        verbose_name='Похожий рецепт',
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        ordering = ('-score',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='recipes_similarrecipe_unique',
+            )
+        ]
+        indexes = [
+            models.Index(fields=['recipe', '-score'],
+                         name='similar_recipe_score_idx'),
+        ]
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
@@ -0,0 +1,145 @@
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, When
+
+from recipes.catalog import bump_version, get_version
+from recipes.models import Recipe, RecipeIngredient
+
+SEARCH_CONFIG = getattr(settings, 'RECIPE_SEARCH_CONFIG', 'russian')
+SEARCH_WEIGHTS = {'name': 3, 'ingredients': 2, 'text': 1}
+TOKEN_RE = re.compile(r'\w+')
+
+
+def uses_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def ingredient_names():
+    return Subquery(
+        RecipeIngredient.objects.filter(recipe=OuterRef('pk')).order_by()
+        .values('recipe').annotate(
+            names=StringAgg('ingredient__name', ' ')
+        ).values('names'))
+
+
+def search_vector():
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(ingredient_names(), weight='B', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(recipe_ids):
+    if not uses_postgres():
+        bump_version(Recipe)
+    elif recipe_ids:
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            search_vector=search_vector())
+
+
+class SearchVectorBatch:
+
+    def __init__(self):
+        self.updated = set()
+        self.deleted = set()
+
+    def __call__(self):
+        update_search_vector(self.updated - self.deleted)
+
+
+def queue_search_vector(recipe_id, deleted=False):
+    # Один пересчет на транзакцию: все изменения рецепта и его
+    # ингредиентов копятся в одном on_commit-обработчике.
+    connection = transaction.get_connection()
+    batch = next((callback for _, callback in connection.run_on_commit
+                  if isinstance(callback, SearchVectorBatch)), None)
+    created = batch is None
+    if created:
+        batch = SearchVectorBatch()
+    (batch.deleted if deleted else batch.updated).add(recipe_id)
+    if created:
+        transaction.on_commit(batch)
+
+
+def tokenize(value):
+    return TOKEN_RE.findall(value.lower())
+
+
+class RecipeSearchIndex:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.entries = ([], {})
+
+    def build(self, version):
+        documents = defaultdict(lambda: defaultdict(int))
+        for recipe_id, name, text in Recipe.objects.values_list(
+                'id', 'name', 'text').iterator():
+            for field, value in (('name', name), ('text', text)):
+                for token in tokenize(value):
+                    documents[token][recipe_id] += SEARCH_WEIGHTS[field]
+        for recipe_id, name in RecipeIngredient.objects.values_list(
+                'recipe_id', 'ingredient__name').iterator():
+            for token in tokenize(name):
+                documents[token][recipe_id] += SEARCH_WEIGHTS['ingredients']
+        self.entries = (sorted(documents), dict(documents))
+        self.version = version
+
+    def get_entries(self):
+        version = get_version(Recipe)
+        if self.version != version:
+            with self.lock:
+                if self.version != version:
+                    self.build(version)
+        return self.entries
+
+    def search(self, query):
+        tokens, postings = self.get_entries()
+        scores = None
+        for term in tokenize(query):
+            matches = defaultdict(int)
+            position = bisect_left(tokens, term)
+            while (position < len(tokens)
+                   and tokens[position].startswith(term)):
+                for recipe_id, weight in postings[tokens[position]].items():
+                    matches[recipe_id] += weight
+                position += 1
+            if scores is None:
+                scores = matches
+            else:
+                scores = {recipe_id: score + matches[recipe_id]
+                          for recipe_id, score in scores.items()
+                          if recipe_id in matches}
+        if not scores:
+            return []
+        return sorted(scores, key=lambda recipe_id: -scores[recipe_id])
+
+
+search_index = RecipeSearchIndex()
+
+
+def search_recipes(queryset, value):
+    if uses_postgres():
+        query = SearchQuery(value, config=SEARCH_CONFIG,
+                            search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-pub_date', '-id')
+    recipe_ids = search_index.search(value)
+    if not recipe_ids:
+        return queryset.none()
+    return queryset.filter(pk__in=recipe_ids).order_by(Case(
+        *[When(pk=recipe_id, then=position)
+          for position, recipe_id in enumerate(recipe_ids)],
+        output_field=IntegerField(),
+    ))
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+
+from recipes.catalog import get_version
+from recipes.models import Ingredient, RecipeIngredient, ShoppingCart
+from users.models import User
+
+SHOPPING_LIST_CACHE_TIMEOUT = getattr(
+    settings, 'SHOPPING_LIST_CACHE_TIMEOUT', 60 * 60)
+
+
+def bump_cart_versions(user_ids):
+    User.objects.filter(pk__in=user_ids).update(
+        cart_version=F('cart_version') + 1)
+
+
+def bump_recipe_carts(recipe):
+    bump_cart_versions(ShoppingCart.objects.filter(
+        recipe=recipe).values('user_id'))
+
+
+def aggregate_shopping_list(user):
+    return RecipeIngredient.objects.filter(
+        recipe__shoppingcart__user=user
+    ).order_by('ingredient__name').values(
+        'ingredient__name', 'ingredient__measurement_unit'
+    ).annotate(ingredient_value=Sum('amount')).values_list(
+        'ingredient__name', 'ingredient__measurement_unit',
+        'ingredient_value'
+    )
+
+
+def get_shopping_list(user):
+    cache_key = 'shopping_list:{}:{}:{}'.format(
+        user.id, user.cart_version, get_version(Ingredient))
+    ingredients = cache.get(cache_key)
+    if ingredients is None:
+        ingredients = list(aggregate_shopping_list(user))
+        cache.set(cache_key, ingredients, SHOPPING_LIST_CACHE_TIMEOUT)
+    return ingredients
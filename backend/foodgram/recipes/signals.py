@@ -0,0 +1,59 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from recipes.catalog import bump_version
+from recipes.counters import change_counter
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from recipes.search import queue_search_vector
+from recipes.shopping_list import bump_cart_versions
+from users.models import User
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_catalog(sender, **kwargs):
+    bump_version(sender)
+
+
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def invalidate_shopping_list(instance, **kwargs):
+    bump_cart_versions([instance.user_id])
+
+
+@receiver(post_save, sender=Favorite)
+def increment_favorites_count(instance, created, **kwargs):
+    if created:
+        change_counter(Recipe.objects.filter(pk=instance.recipe_id),
+                       'favorites_count', 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def decrement_favorites_count(instance, **kwargs):
+    change_counter(Recipe.objects.filter(pk=instance.recipe_id),
+                   'favorites_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(instance, created, **kwargs):
+    if created:
+        change_counter(User.objects.filter(pk=instance.author_id),
+                       'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(instance, **kwargs):
+    change_counter(User.objects.filter(pk=instance.author_id),
+                   'recipes_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def refresh_search_vector(sender, instance, **kwargs):
+    queue_search_vector(
+        instance.pk if sender is Recipe else instance.recipe_id)
+
+
+@receiver(pre_delete, sender=Recipe)
+def invalidate_search_index(instance, **kwargs):
+    queue_search_vector(instance.pk, deleted=True)
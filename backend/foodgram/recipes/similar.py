@@ -0,0 +1,132 @@
+from collections import Counter, defaultdict
+from heapq import nlargest
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from recipes.models import Recipe, RecipeIngredient, SimilarRecipe
+
+SIMILAR_TOP_K = getattr(settings, 'SIMILAR_RECIPES_TOP_K', 10)
+SIMILAR_MAX_DF = getattr(settings, 'SIMILAR_RECIPES_MAX_DF', 0.2)
+BATCH_SIZE = 1000
+
+
+def max_frequency(total, max_df):
+    return max(int(max_df * total), 1)
+
+
+class IngredientMatrix:
+
+    def __init__(self, pairs):
+        self.recipes = defaultdict(set)
+        self.postings = defaultdict(list)
+        for recipe_id, ingredient_id in pairs:
+            if ingredient_id not in self.recipes[recipe_id]:
+                self.recipes[recipe_id].add(ingredient_id)
+                self.postings[ingredient_id].append(recipe_id)
+
+    def frequent(self, max_df):
+        limit = max_frequency(len(self.recipes), max_df)
+        return {ingredient_id
+                for ingredient_id, recipes in self.postings.items()
+                if len(recipes) > limit}
+
+    def neighbours(self, recipe_id, top_k, frequent):
+        vector = self.recipes.get(recipe_id, set())
+        overlap = Counter()
+        for ingredient_id in vector - frequent:
+            overlap.update(self.postings[ingredient_id])
+        overlap.pop(recipe_id, None)
+        size = len(vector)
+        return nlargest(top_k, (
+            (common / (size + len(self.recipes[other]) - common), other)
+            for other, common in overlap.items()
+        ))
+
+
+def similar_rows(matrix, recipe_ids, top_k, frequent):
+    for recipe_id in recipe_ids:
+        for score, other in matrix.neighbours(recipe_id, top_k, frequent):
+            yield SimilarRecipe(recipe_id=recipe_id, similar_id=other,
+                                score=score)
+
+
+def build_similar(top_k=SIMILAR_TOP_K, max_df=SIMILAR_MAX_DF):
+    matrix = IngredientMatrix(RecipeIngredient.objects.values_list(
+        'recipe_id', 'ingredient_id').iterator())
+    rows = similar_rows(matrix, list(matrix.recipes), top_k,
+                        matrix.frequent(max_df))
+    total = 0
+    with transaction.atomic():
+        SimilarRecipe.objects.all().delete()
+        while True:
+            batch = list(islice(rows, BATCH_SIZE))
+            if not batch:
+                break
+            SimilarRecipe.objects.bulk_create(batch)
+            total += len(batch)
+    return len(matrix.recipes), total
+
+
+def neighbour_scores(recipe_id, max_df):
+    limit = max_frequency(Recipe.objects.count(), max_df)
+    frequencies = dict(RecipeIngredient.objects.filter(
+        ingredient__in=RecipeIngredient.objects.filter(
+            recipe=recipe_id).values('ingredient')
+    ).values('ingredient').annotate(
+        frequency=Count('recipe', distinct=True)
+    ).values_list('ingredient', 'frequency'))
+    rare = [ingredient_id for ingredient_id, frequency in frequencies.items()
+            if frequency <= limit]
+    candidates = RecipeIngredient.objects.filter(
+        ingredient__in=rare).values('recipe')
+    matrix = IngredientMatrix(RecipeIngredient.objects.filter(
+        recipe__in=candidates).values_list('recipe_id', 'ingredient_id'))
+    frequent = set(frequencies) - set(rare)
+    return {other: score for score, other in matrix.neighbours(
+        recipe_id, len(matrix.recipes), frequent)}
+
+
+def top_rows(recipe_id, scores, top_k):
+    return [SimilarRecipe(recipe_id=recipe_id, similar_id=other, score=score)
+            for other, score in nlargest(
+                top_k, scores.items(), key=lambda item: (item[1], item[0]))]
+
+
+def refresh_similar(recipe_id, top_k=SIMILAR_TOP_K, max_df=SIMILAR_MAX_DF):
+    scores = neighbour_scores(recipe_id, max_df)
+    rows = top_rows(recipe_id, scores, top_k)
+    # Обратная сторона: рецепт входит в списки соседей со своей оценкой.
+    # Если прежняя оценка была выше, список соседа пересчитывается
+    # целиком: освободившееся место может занять другой рецепт.
+    stale = {owner for owner, score in SimilarRecipe.objects.filter(
+        similar=recipe_id).values_list('recipe', 'score')
+        if scores.get(owner, 0) < score}
+    neighbours = defaultdict(dict)
+    for pk, owner, other, score in SimilarRecipe.objects.filter(
+            recipe__in=scores).exclude(similar=recipe_id).values_list(
+            'pk', 'recipe', 'similar', 'score'):
+        neighbours[owner][other] = (score, pk)
+    trimmed = []
+    for owner, score in scores.items():
+        if owner in stale:
+            continue
+        current = neighbours[owner]
+        current[recipe_id] = (score, None)
+        kept = dict(nlargest(top_k, current.items(),
+                             key=lambda item: (item[1][0], item[0])))
+        if recipe_id in kept:
+            rows.append(SimilarRecipe(recipe_id=owner, similar_id=recipe_id,
+                                      score=score))
+        trimmed.extend(pk for other, (_, pk) in current.items()
+                       if other not in kept and pk is not None)
+    for owner in stale:
+        rows.extend(top_rows(owner, neighbour_scores(owner, max_df), top_k))
+    with transaction.atomic():
+        SimilarRecipe.objects.filter(
+            Q(recipe=recipe_id) | Q(similar=recipe_id) | Q(pk__in=trimmed)
+            | Q(recipe__in=stale)
+        ).delete()
+        SimilarRecipe.objects.bulk_create(rows, batch_size=BATCH_SIZE)
@@ -0,0 +1,26 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'RECIPE_BACKGROUND_WORKERS', 2),
+    thread_name_prefix='recipes',
+)
+
+
+def run_task(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Фоновая задача %s завершилась с ошибкой',
+                         func.__name__)
+    finally:
+        connection.close()
+
+
+def run_in_background(func, *args):
+    return executor.submit(run_task, func, *args)
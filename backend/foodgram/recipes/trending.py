@@ -0,0 +1,64 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, ShoppingCart, TrendingState
+
+TRENDING_HALF_LIFE = getattr(settings, 'TRENDING_HALF_LIFE',
+                             timedelta(days=3))
+TRENDING_WINDOW = getattr(settings, 'TRENDING_WINDOW', timedelta(days=30))
+TRENDING_LAG = timedelta(minutes=1)
+TRENDING_MAX_HALF_LIVES = 500
+TRENDING_WEIGHTS = ((Favorite, 1.0), (ShoppingCart, 0.5))
+BATCH_SIZE = 500
+
+
+def event_score(created, weight, epoch):
+    # Вместо затухания старых событий растет вес новых: порядок рецептов
+    # тот же, а накопленные суммы не нужно пересчитывать при каждом запуске.
+    return weight * 2 ** ((created - epoch) / TRENDING_HALF_LIFE)
+
+
+def collect_scores(since, until, epoch):
+    scores = defaultdict(float)
+    for model, weight in TRENDING_WEIGHTS:
+        events = model.objects.filter(
+            created__gt=since, created__lte=until
+        ).values_list('recipe_id', 'created')
+        for recipe_id, created in events.iterator():
+            scores[recipe_id] += event_score(created, weight, epoch)
+    return scores
+
+
+def add_scores(scores):
+    items = list(scores.items())
+    for start in range(0, len(items), BATCH_SIZE):
+        batch = dict(items[start:start + BATCH_SIZE])
+        Recipe.objects.filter(pk__in=batch).update(
+            trending_score=F('trending_score') + Case(
+                *[When(pk=pk, then=Value(score))
+                  for pk, score in batch.items()],
+                output_field=FloatField(),
+            ))
+
+
+@transaction.atomic
+def update_trending(full=False):
+    until = timezone.now() - TRENDING_LAG
+    state = TrendingState.objects.select_for_update().first()
+    if (full or state is None or until - state.epoch
+            > TRENDING_HALF_LIFE * TRENDING_MAX_HALF_LIVES):
+        full = True
+        since = epoch = until - TRENDING_WINDOW
+        Recipe.objects.exclude(trending_score=0).update(trending_score=0)
+    else:
+        since, epoch = state.watermark, state.epoch
+    scores = collect_scores(since, until, epoch)
+    add_scores(scores)
+    TrendingState.objects.update_or_create(
+        pk=1, defaults={'watermark': until, 'epoch': epoch})
+    return full, len(scores)
@@ -0,0 +1,56 @@
+from django.db import connections, router
+from django.db.models import sql
+from django.db.models.signals import post_delete, post_save
+
+
+def insert_ignore(instance, requires=None):
+    model = type(instance)
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    fields = [field for field in model._meta.local_concrete_fields
+              if not field.primary_key]
+    statement = '{} {} ({}) SELECT {}'.format(
+        connection.ops.insert_statement(ignore_conflicts=True),
+        quote_name(model._meta.db_table),
+        ', '.join(quote_name(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    params = [field.get_db_prep_save(field.pre_save(instance, True),
+                                     connection)
+              for field in fields]
+    if requires is not None:
+        subquery, subquery_params = requires.values(
+            'pk').query.get_compiler(using).as_sql()
+        statement += f' WHERE EXISTS ({subquery})'
+        params += subquery_params
+    statement += connection.ops.ignore_conflicts_suffix_sql(
+        ignore_conflicts=True)
+    with connection.cursor() as cursor:
+        cursor.execute(statement, params)
+        inserted = cursor.rowcount > 0
+    if inserted:
+        post_save.send(sender=model, instance=instance, created=True,
+                       update_fields=None, raw=False, using=using)
+    return inserted
+
+
+def delete_one(model, **lookup):
+    using = router.db_for_write(model)
+    connection = connections[using]
+    queryset = model.objects.filter(**lookup)
+    if connection.vendor != 'postgresql':
+        return queryset.delete()[1].get(model._meta.label, 0) > 0
+    fields = model._meta.concrete_fields
+    statement, params = queryset.query.chain(
+        sql.DeleteQuery).get_compiler(using).as_sql()
+    statement += ' RETURNING {}'.format(', '.join(
+        connection.ops.quote_name(field.column) for field in fields))
+    with connection.cursor() as cursor:
+        cursor.execute(statement, params)
+        rows = cursor.fetchall()
+    for row in rows:
+        instance = model.from_db(
+            using, [field.attname for field in fields], row)
+        post_delete.send(sender=model, instance=instance, using=using)
+    return bool(rows)
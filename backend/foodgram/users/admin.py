@@ -8,7 +8,7 @@ class UserAdmin(admin.ModelAdmin):
     list_display = (
         'id', 'username',
         'first_name', 'last_name',
-        'email'
+        'email', 'recipes_count', 'followers_count'
     )
     search_fields = (
         'username', 'email',
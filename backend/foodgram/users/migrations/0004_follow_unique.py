@@ -0,0 +1,33 @@
+# Generated by Django 3.2.19 on 2026-10-17 06:03
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def delete_duplicate_follows(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Follow = apps.get_model('users', 'Follow')
+    first = Follow.objects.values('user', 'author').annotate(
+        first=Min('id')).values('first')
+    if Follow.objects.exclude(id__in=first).delete()[0]:
+        User.objects.update(followers_count=Coalesce(Subquery(
+            Follow.objects.filter(author=OuterRef('pk')).order_by().values(
+                'author').annotate(total=Count('pk')).values('total')
+        ), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_follows,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='users_follow_unique'),
+        ),
+    ]
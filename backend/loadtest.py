@@ -0,0 +1,366 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from math import ceil
+from pathlib import Path
+from urllib.parse import urlsplit
+
+PROJECT_DIR = Path(__file__).resolve().parent / 'foodgram'
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(ceil(len(ordered) * percent / 100) - 1, 0)]
+
+
+class HTTPConnection:
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None, token=None):
+        payload = b'' if body is None else json.dumps(body).encode()
+        lines = [
+            f'{method} {path} HTTP/1.1',
+            f'Host: {self.host}:{self.port}',
+            'Accept: application/json',
+            f'Content-Length: {len(payload)}',
+        ]
+        if payload:
+            lines.append('Content-Type: application/json')
+        if token:
+            lines.append(f'Authorization: Token {token}')
+        message = ('\r\n'.join(lines) + '\r\n\r\n').encode() + payload
+        try:
+            return await asyncio.wait_for(self.send(message), self.timeout)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError,
+                ValueError):
+            self.close()
+            return 0, b''
+
+    async def send(self, message):
+        reused = self.writer is not None
+        if not reused:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port)
+        self.writer.write(message)
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if not status_line and reused:
+            self.close()
+            return await self.send(message)
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, value = line.decode('latin-1').split(':', 1)
+            headers[name.strip().lower()] = value.strip().lower()
+        if 'chunked' in headers.get('transfer-encoding', ''):
+            content = await self.read_chunked()
+        elif 'content-length' in headers:
+            content = await self.reader.readexactly(
+                int(headers['content-length']))
+        elif status in (204, 304) or status < 200:
+            content = b''
+        else:
+            content = await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection') == 'close':
+            self.close()
+        return status, content
+
+    async def read_chunked(self):
+        content = bytearray()
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                while await self.reader.readline() not in (b'\r\n', b''):
+                    pass
+                return bytes(content)
+            content += await self.reader.readexactly(size)
+            await self.reader.readexactly(2)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Stats:
+
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def add(self, endpoint, status, duration):
+        self.timings[endpoint].append(duration * 1000)
+        self.statuses[endpoint][status] += 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        for endpoint, timings in sorted(self.timings.items()):
+            statuses = self.statuses[endpoint]
+            errors = sum(count for status, count in statuses.items()
+                         if status == 0 or status >= 500)
+            result = {
+                'requests': len(timings),
+                'rps': round(len(timings) / elapsed, 2),
+                'error_rate': round(errors / len(timings), 4),
+                'statuses': {str(status): count
+                             for status, count in sorted(statuses.items())},
+            }
+            result.update({
+                f'p{percent}_ms': round(percentile(timings, percent), 2)
+                for percent in PERCENTILES})
+            result['max_ms'] = round(max(timings), 2)
+            endpoints[endpoint] = result
+        total = sum(len(timings) for timings in self.timings.values())
+        errors = sum(result['error_rate'] * result['requests']
+                     for result in endpoints.values())
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'requests': total,
+            'rps': round(total / elapsed, 2),
+            'error_rate': round(errors / total, 4) if total else 0,
+            'endpoints': endpoints,
+        }
+
+
+class VirtualUser:
+
+    def __init__(self, client, stats, catalog, email, password, think_time):
+        self.client = client
+        self.stats = stats
+        self.catalog = catalog
+        self.email = email
+        self.password = password
+        self.think_time = think_time
+        self.token = None
+
+    async def call(self, endpoint, method, path, body=None):
+        start = time.perf_counter()
+        status, content = await self.client.request(
+            method, path, body, self.token)
+        self.stats.add(f'{method} {endpoint}', status,
+                       time.perf_counter() - start)
+        if self.think_time:
+            await asyncio.sleep(random.expovariate(1 / self.think_time))
+        try:
+            return status, json.loads(content) if content else None
+        except ValueError:
+            return status, None
+
+    async def login(self):
+        status, data = await self.call(
+            '/api/auth/token/login/', 'POST', '/api/auth/token/login/',
+            {'email': self.email, 'password': self.password})
+        if status == 200:
+            self.token = data['auth_token']
+        return self.token is not None
+
+    def recipe(self):
+        return random.choice(self.catalog['recipes'])
+
+    async def browse_feed(self):
+        await self.call('/api/recipes/', 'GET', '/api/recipes/?limit=6')
+        await self.call('/api/recipes/', 'GET',
+                        '/api/recipes/?limit=6&page=2')
+        await self.call('/api/recipes/feed/', 'GET',
+                        '/api/recipes/feed/?limit=6')
+
+    async def filter_by_tags(self):
+        tags = random.sample(self.catalog['tags'],
+                             min(2, len(self.catalog['tags'])))
+        query = '&'.join(f'tags={slug}' for slug in tags)
+        await self.call('/api/recipes/?tags=', 'GET',
+                        f'/api/recipes/?limit=6&{query}')
+
+    async def open_recipe(self):
+        recipe_id = self.recipe()
+        await self.call('/api/recipes/{id}/', 'GET',
+                        f'/api/recipes/{recipe_id}/')
+        await self.call('/api/recipes/{id}/similar/', 'GET',
+                        f'/api/recipes/{recipe_id}/similar/')
+
+    async def favorite(self):
+        path = f'/api/recipes/{self.recipe()}/favorite/'
+        await self.call('/api/recipes/{id}/favorite/', 'POST', path)
+        await self.call('/api/recipes/{id}/favorite/', 'DELETE', path)
+
+    async def shopping_cart(self):
+        path = f'/api/recipes/{self.recipe()}/shopping_cart/'
+        await self.call('/api/recipes/{id}/shopping_cart/', 'POST', path)
+        await self.call('/api/recipes/download_shopping_cart/', 'GET',
+                        '/api/recipes/download_shopping_cart/')
+        await self.call('/api/recipes/{id}/shopping_cart/', 'DELETE', path)
+
+    async def follow_author(self):
+        author_id = random.choice(self.catalog['authors'])
+        path = f'/api/users/{author_id}/subscribe/'
+        await self.call('/api/users/{id}/subscribe/', 'POST', path)
+        await self.call('/api/users/subscriptions/', 'GET',
+                        '/api/users/subscriptions/?recipes_limit=3')
+        await self.call('/api/users/{id}/subscribe/', 'DELETE', path)
+
+    async def run(self, journeys, deadline):
+        names, weights = zip(*journeys.items())
+        while time.monotonic() < deadline:
+            journey = random.choices(names, weights)[0]
+            await getattr(self, journey)()
+        self.client.close()
+
+
+JOURNEYS = {
+    'browse_feed': 30,
+    'filter_by_tags': 15,
+    'open_recipe': 25,
+    'favorite': 10,
+    'shopping_cart': 10,
+    'follow_author': 10,
+}
+
+
+async def load_catalog(client):
+    _, tags = await client.request('GET', '/api/tags/')
+    _, recipes = await client.request('GET', '/api/recipes/?limit=100')
+    client.close()
+    recipes = json.loads(recipes)['results'] if recipes else []
+    if not recipes:
+        raise SystemExit('Нет рецептов: запустите '
+                         'manage.py seed_benchmark_data')
+    return {
+        'tags': [tag['slug'] for tag in json.loads(tags)],
+        'recipes': [recipe['id'] for recipe in recipes],
+        'authors': sorted({recipe['author']['id'] for recipe in recipes}),
+    }
+
+
+async def run_load(options):
+    url = urlsplit(options.url)
+    host, port = url.hostname, url.port or 80
+
+    def connect():
+        return HTTPConnection(host, port, options.timeout)
+
+    catalog = await load_catalog(connect())
+    users = [VirtualUser(connect(), Stats(), catalog,
+                         f'{options.user_prefix}{index}@example.com',
+                         options.password, options.think_time)
+             for index in range(options.concurrency)]
+    logged_in = await asyncio.gather(*(user.login() for user in users))
+    users = [user for user, success in zip(users, logged_in) if success]
+    if not users:
+        raise SystemExit('Не удалось войти: проверьте --user-prefix '
+                         'и --password')
+    stats = Stats()
+    for user in users:
+        user.stats = stats
+    journeys = {name: weight for name, weight in JOURNEYS.items()
+                if not options.journey or name in options.journey}
+    start = time.monotonic()
+    tasks = []
+    for user in users:
+        if options.ramp_up:
+            await asyncio.sleep(options.ramp_up / len(users))
+        tasks.append(asyncio.ensure_future(
+            user.run(journeys, start + options.duration)))
+    await asyncio.gather(*tasks)
+    report = stats.report(time.monotonic() - start)
+    report['concurrency'] = len(users)
+    report['server'] = options.server_cmd
+    return report
+
+
+async def wait_for_server(url, timeout):
+    url = urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(url.hostname, url.port)
+        except OSError:
+            await asyncio.sleep(0.2)
+            continue
+        writer.close()
+        return
+    raise SystemExit(f'Сервер не поднялся за {timeout} с')
+
+
+def print_report(report):
+    print('{:<46} {:>7} {:>8} {:>7} {:>8} {:>8} {:>8}'.format(
+        'endpoint', 'req', 'rps', 'err', 'p50', 'p95', 'p99'))
+    for name, result in report['endpoints'].items():
+        print('{:<46} {:>7} {:>8} {:>7.2%} {:>8} {:>8} {:>8}'.format(
+            name, result['requests'], result['rps'], result['error_rate'],
+            result['p50_ms'], result['p95_ms'], result['p99_ms']))
+    print('Всего: {requests} запросов, {rps} rps, ошибок {error_rate:.2%} '
+          'за {elapsed_s} с'.format(**report))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Нагрузочный тест API foodgram: сценарии пользователей '
+                    'с заданной конкурентностью')
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30,
+                        help='Длительность в секундах')
+    parser.add_argument('--ramp-up', type=float, default=0,
+                        help='За сколько секунд запустить всех '
+                             'пользователей')
+    parser.add_argument('--think-time', type=float, default=0,
+                        help='Средняя пауза между запросами, с')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--journey', action='append', choices=JOURNEYS)
+    parser.add_argument('--user-prefix', default='bench_',
+                        help='Пользователи из seed_benchmark_data')
+    parser.add_argument('--password', default='benchmark')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--output', help='Файл для JSON-отчета')
+    parser.add_argument('--workers', type=int,
+                        help='Запустить gunicorn с этим числом воркеров')
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--server-cmd',
+                        help='Команда запуска сервера вместо gunicorn, '
+                             'выполняется в backend/foodgram')
+    options = parser.parse_args()
+    random.seed(options.seed)
+    if options.workers and not options.server_cmd:
+        options.server_cmd = (
+            'gunicorn foodgram.wsgi:application --bind {} --workers {} '
+            '--threads {}'.format(urlsplit(options.url).netloc,
+                                  options.workers, options.threads))
+    server = None
+    if options.server_cmd:
+        server = subprocess.Popen(options.server_cmd, shell=True,
+                                  cwd=PROJECT_DIR, env=os.environ.copy(),
+                                  start_new_session=True)
+    try:
+        if server is not None:
+            asyncio.run(wait_for_server(options.url, 30))
+        report = asyncio.run(run_load(options))
+    finally:
+        if server is not None:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait()
+    print_report(report)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    return 1 if report['error_rate'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())